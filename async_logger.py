@@ -0,0 +1,196 @@
+import datetime
+import json
+import os
+import platform
+import queue
+import sys
+import threading
+import time
+
+class AsyncLogger:
+    """Drop-in replacement for SimpleLogger that never touches the disk from the event loop.
+
+    log() only puts a record on a queue; a background thread writes the pending records in one
+    batch every `flush_interval` seconds (or as soon as `batch_size` are waiting), echoes them to
+    stdout and rotates `log_file` once it exceeds `max_bytes`, keeping `backup_count` old files.
+    Records are written in SimpleLogger's "[timestamp] message" format, or one JSON object per line with
+    `json_format`. send_now() also forwards the message to `webhook_url` (Discord-style
+    {"content": ...} POST) from a second thread, so a slow webhook cannot delay order flow.
+    Call close() (or use `async with`) to flush what is left before exiting.
+    """
+
+    def __init__(
+        self,
+        log_file="trading_log.txt",
+        json_format=False,
+        max_bytes=10 * 1024 * 1024,
+        backup_count=5,
+        flush_interval=0.5,
+        batch_size=1000,
+        echo=True,
+        webhook_url=None,
+        webhook_timeout=5.0,
+    ):
+        self.log_file = log_file
+        self.json_format = json_format
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.echo = echo
+        self.webhook_url = webhook_url
+        self.webhook_timeout = webhook_timeout
+        self.dropped_webhooks = 0
+        self._file = None
+        self._records = queue.Queue()
+        self._webhooks = queue.Queue()
+        self._closed = False
+        # Pas de threads sous Pyodide : on écrit directement
+        self._threaded = platform.system() != "Emscripten"
+        self._writer_thread = None
+        self._webhook_thread = None
+        if self._threaded:
+            self._writer_thread = threading.Thread(target=self._writer, name="log-writer", daemon=True)
+            self._writer_thread.start()
+            if webhook_url:
+                self._webhook_thread = threading.Thread(target=self._webhook_sender, name="log-webhook", daemon=True)
+                self._webhook_thread.start()
+
+    def log(self, message, level="INFO", **fields):
+        record = {"time": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"), "level": level, "message": message, **fields}
+        if self._threaded:
+            self._records.put_nowait(record)
+        else:
+            self._write([record])
+
+    async def send_now(self, message, level="INFO"):
+        self.log(message, level=level)
+        if self.webhook_url and self._threaded:
+            self._webhooks.put_nowait(f"{level}: {message}")
+
+    def _format(self, record):
+        if self.json_format:
+            return json.dumps(record, default=str) + "\n"
+        if record["level"] == "INFO":
+            return f"[{record['time']}] {record['message']}\n"
+        return f"[{record['time']}] {record['level']}: {record['message']}\n"
+
+    def _rotate(self):
+        self._file.close()
+        self._file = None
+        for i in range(self.backup_count - 1, 0, -1):
+            if os.path.exists(f"{self.log_file}.{i}"):
+                os.replace(f"{self.log_file}.{i}", f"{self.log_file}.{i + 1}")
+        if self.backup_count > 0:
+            os.replace(self.log_file, f"{self.log_file}.1")
+        else:
+            os.remove(self.log_file)
+
+    def _write(self, records):
+        text = "".join(self._format(record) for record in records)
+        if self.echo:
+            sys.stdout.write(text)
+            sys.stdout.flush()
+        if self._file is None:
+            self._file = open(self.log_file, "a")
+        self._file.write(text)
+        self._file.flush()
+        if self.max_bytes and self._file.tell() >= self.max_bytes:
+            self._rotate()
+
+    def _writer(self):
+        while True:
+            record = self._records.get()
+            if record is None:
+                break
+            batch = [record]
+            stop = False
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                try:
+                    record = self._records.get(timeout=timeout) if timeout > 0 else self._records.get_nowait()
+                except queue.Empty:
+                    break
+                if record is None:
+                    stop = True
+                    break
+                batch.append(record)
+            try:
+                self._write(batch)
+            except OSError as e:
+                sys.stderr.write(f"Logger write failed: {e}\n")
+            if stop:
+                break
+
+    def _webhook_sender(self):
+        # Importé ici : seul ce thread en a besoin, et seulement avec un webhook
+        import urllib.request
+        while True:
+            content = self._webhooks.get()
+            if content is None:
+                break
+            request = urllib.request.Request(
+                self.webhook_url,
+                data=json.dumps({"content": content}).encode(),
+                headers={"Content-Type": "application/json"},
+                method="POST",
+            )
+            try:
+                with urllib.request.urlopen(request, timeout=self.webhook_timeout) as response:
+                    response.read()
+            except Exception as e:
+                self.dropped_webhooks += 1
+                self._records.put_nowait({"time": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"), "level": "WARNING", "message": f"Webhook delivery failed: {e}"})
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        # Le webhook d'abord : ses échecs sont encore journalisés
+        if self._webhook_thread is not None:
+            self._webhooks.put_nowait(None)
+            self._webhook_thread.join()
+        if self._writer_thread is not None:
+            self._records.put_nowait(None)
+            self._writer_thread.join()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.close()
+
+class LocalWebhook:
+    """Local stand-in for a Discord webhook: accepts POSTed JSON and appends it to `output_file`."""
+
+    def __init__(self, host="127.0.0.1", port=0, output_file="webhook_messages.jsonl"):
+        import http.server
+        output = output_file
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                with open(output, "a") as f:
+                    f.write(json.dumps({"time": datetime.datetime.now().isoformat(), "payload": json.loads(body or b"null")}) + "\n")
+                self.send_response(204)
+                self.end_headers()
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = http.server.ThreadingHTTPServer((host, port), Handler)
+        self.url = f"http://{host}:{self.server.server_address[1]}/"
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, name="local-webhook", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,91 @@
+import itertools
+import numpy as np
+import pandas as pd
+from utilities.custom_indicators import trix_batch, ema_batch
+
+GRID_KEYS = ["trix_length", "trix_signal_length", "trix_signal_type", "long_ma_length"]
+
+def make_grid(trix_length, trix_signal_length, trix_signal_type=("sma", "ema"), long_ma_length=(300,)):
+    return [
+        dict(zip(GRID_KEYS, values))
+        for values in itertools.product(trix_length, trix_signal_length, trix_signal_type, long_ma_length)
+    ]
+
+def _ffill_state(enter, exit):
+    # True from each enter event until the next exit event, per row
+    index = np.where(enter | exit, np.arange(enter.shape[1], dtype="int32"), -1)
+    np.maximum.accumulate(index, axis=1, out=index)
+    state = np.take_along_axis(enter, np.maximum(index, 0), axis=1)
+    state &= index >= 0
+    return state
+
+class TrixBacktest:
+    def __init__(self, df: pd.DataFrame, sides=("long",), leverage: float = 1.0, fee: float = 0.0006, chunk_size: int = 512, warmup: int = 0):
+        self.close = df["close"].astype("float64").reset_index(drop=True)
+        # Les `warmup` premières bougies ne servent qu'aux indicateurs, pas au score
+        self.warmup = warmup
+        self.sides = sides
+        self.leverage = leverage
+        self.fee = fee
+        self.chunk_size = chunk_size
+
+    def positions(self, grid):
+        """Position held after the close of each bar (1 long, -1 short, 0 flat), one row per parameter set.
+
+        The decision on bar i uses the same rules as main() applied to iloc[-2], i.e. bar i is the last
+        closed candle and the order is filled at its close.
+        """
+        close = self.close.to_numpy()
+        hist = trix_batch(
+            close,
+            [p["trix_length"] for p in grid],
+            [p["trix_signal_length"] for p in grid],
+            [p["trix_signal_type"] for p in grid],
+        )[:, 2 * len(grid):].T
+        long_ma = ema_batch(close, [p["long_ma_length"] for p in grid]).T
+        # Comparisons with NaN are False, so warm-up bars never trigger anything
+        with np.errstate(invalid="ignore"):
+            position = np.zeros(hist.shape, dtype="int8")
+            if "long" in self.sides:
+                position += _ffill_state((hist > 0) & (close > long_ma), hist < 0)
+            if "short" in self.sides:
+                position -= _ffill_state((hist < 0) & (close < long_ma), hist > 0)
+        return position
+
+    def _evaluate(self, grid):
+        position = self.positions(grid)[:, self.warmup:]
+        close = self.close.to_numpy()[self.warmup:]
+        returns = np.zeros(len(close))
+        returns[1:] = close[1:] / close[:-1] - 1
+        change = np.diff(position, axis=1, prepend=0)
+        equity = np.empty(position.shape)
+        equity[:, 0] = 0
+        np.multiply(position[:, :-1], returns[1:], out=equity[:, 1:])
+        equity -= np.abs(change) * self.fee
+        equity *= self.leverage
+        equity += 1
+        np.cumprod(equity, axis=1, out=equity)
+        peak = np.maximum.accumulate(equity, axis=1)
+        np.divide(equity, peak, out=peak)
+        trades = np.count_nonzero((position != 0) & (change != 0), axis=1)
+        return {
+            "pnl_pct": (equity[:, -1] - 1) * 100,
+            "max_drawdown_pct": (1 - peak.min(axis=1)) * 100,
+            "trades": trades,
+            "exposure_pct": np.count_nonzero(position, axis=1) / position.shape[1] * 100,
+        }
+
+    def run(self, grid) -> pd.DataFrame:
+        # Chunks of sets sharing the same lengths let trix_batch reuse each triple EMA
+        order = sorted(range(len(grid)), key=lambda i: [grid[i][key] for key in GRID_KEYS])
+        results = []
+        for i in range(0, len(order), self.chunk_size):
+            chunk = [grid[j] for j in order[i:i + self.chunk_size]]
+            metrics = self._evaluate(chunk)
+            results.append(pd.concat([pd.DataFrame(chunk)[GRID_KEYS], pd.DataFrame(metrics)], axis=1))
+        results = pd.concat(results, ignore_index=True)
+        results.index = order
+        return results.sort_index()
+
+def backtest_trix(df, grid, sides=("long",), leverage=1.0, fee=0.0006) -> pd.DataFrame:
+    return TrixBacktest(df, sides=sides, leverage=leverage, fee=fee).run(grid)
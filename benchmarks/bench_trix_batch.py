@@ -0,0 +1,42 @@
+import time
+import numpy as np
+import pandas as pd
+from utilities.custom_indicators import Trix, trix_batch
+
+# (candles, configurations sharing the same close series)
+CASES = [(600, 4), (600, 50), (10_000, 50), (10_000, 500)]
+
+def make_configs(k, rng):
+    return (
+        rng.integers(5, 50, k),
+        rng.integers(5, 50, k),
+        rng.choice(["sma", "ema"], k),
+    )
+
+def bench(function, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def per_instance(close, trix_lengths, trix_signal_lengths, trix_signal_types):
+    for length, signal_length, signal_type in zip(trix_lengths, trix_signal_lengths, trix_signal_types):
+        trix_obj = Trix(close, int(length), int(signal_length), signal_type)
+        trix_obj.get_trix_pct_line()
+        trix_obj.get_trix_signal_line()
+        trix_obj.get_trix_histo()
+
+def main():
+    rng = np.random.default_rng(0)
+    print(f"{'candles':>8} {'configs':>8} {'Trix (s)':>10} {'trix_batch (s)':>15} {'speedup':>8}")
+    for n, k in CASES:
+        close = pd.Series(3000 * np.exp(np.cumsum(rng.normal(0, 0.01, n))))
+        configs = make_configs(k, rng)
+        t_instance = bench(lambda: per_instance(close, *configs))
+        t_batch = bench(lambda: trix_batch(close, *configs))
+        print(f"{n:>8} {k:>8} {t_instance:>10.4f} {t_batch:>15.4f} {t_instance / t_batch:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def import_times(module="trix_multi_bybit"):
+    """Per-module import cost of `module` in a fresh interpreter, from python -X importtime.
+
+    Returns [{"module", "self_us", "cumulative_us", "depth"}] in import order, depth 1 being the
+    modules imported directly by `module` (or by site at startup).
+    """
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [REPO, env.get("PYTHONPATH")]))
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-W", "ignore", "-c", f"import {module}"],
+        env=env, capture_output=True, text=True,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{completed.stderr[-2000:]}")
+    rows = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append({
+            "module": name.strip(),
+            "self_us": int(self_us),
+            "cumulative_us": int(cumulative_us),
+            # importtime indente de deux espaces par niveau d'import
+            "depth": (len(name) - len(name.lstrip()) - 1) // 2,
+        })
+    return rows
+
+def packages(rows):
+    # Coût propre cumulé par paquet de premier niveau (pandas, ccxt, pydantic...)
+    totals = {}
+    for row in rows:
+        package = row["module"].split(".")[0]
+        totals[package] = totals.get(package, 0) + row["self_us"]
+    return dict(sorted(totals.items(), key=lambda item: -item[1]))
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time report of the strategy script")
+    parser.add_argument("--module", default="trix_multi_bybit", help="module to import")
+    parser.add_argument("--top", type=int, default=25, help="rows per table")
+    parser.add_argument("--output", help="write the full report to this JSON path")
+    args = parser.parse_args()
+
+    rows = import_times(args.module)
+    total = next(row["cumulative_us"] for row in reversed(rows) if row["module"] == args.module)
+    print(f"import {args.module}: {total / 1000:.1f} ms")
+    print(f"\n{'package':<40} {'self ms':>10}")
+    for package, self_us in list(packages(rows).items())[:args.top]:
+        print(f"{package:<40} {self_us / 1000:>10.1f}")
+    print(f"\n{'module':<40} {'self ms':>10} {'cumul. ms':>10}")
+    for row in sorted(rows, key=lambda row: -row["self_us"])[:args.top]:
+        print(f"{row['module']:<40} {row['self_us'] / 1000:>10.1f} {row['cumulative_us'] / 1000:>10.1f}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"module": args.module, "total_us": total, "packages": packages(rows), "modules": rows}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import trix_multi_bybit as strategy
+from utilities.custom_indicators import Trix, rma, get_n_columns, LagMatrix
+from utilities.perp_exchange import PerpExchange, TIMEFRAME_MS
+from utilities.sim_exchange import SimExchange
+from utilities.request_scheduler import ENDPOINT_GROUPS, RequestScheduler
+from utilities.synthetic_market import SyntheticMarket
+
+MICRO_SIZES = [1_000, 100_000, 1_000_000]
+MACRO_PAIRS = [2, 50, 500]
+MARKET_SIZES = [(100, 10_000), (1_000, 100_000)]
+DEFAULT_TOLERANCE = 0.2
+
+class QuietLogger:
+    def log(self, message, level="INFO", **fields):
+        pass
+
+    async def send_now(self, message, level="INFO"):
+        pass
+
+class PagedSession:
+    # Returns pre-built candle pages instantly so only the DataFrame assembly is measured
+    def __init__(self, rows, timeframe="1m"):
+        tf_ms = TIMEFRAME_MS[timeframe]
+        end_ts = int(datetime.datetime.now().timestamp() * 1000)
+        ts = np.arange(end_ts - rows * tf_ms, end_ts, tf_ms)
+        self.candles = np.column_stack([ts, np.random.default_rng(0).uniform(1, 2, (len(ts), 5))]).tolist()
+        self.start_ts = int(ts[0])
+        self.tf_ms = tf_ms
+
+    async def fetch_ohlcv(self, pair, timeframe, since=None, limit=None, params={}):
+        start = max(0, (since - self.start_ts) // self.tf_ms)
+        return self.candles[start:start + limit]
+
+def make_close(rows):
+    return pd.Series(3000 * np.exp(np.cumsum(np.random.default_rng(0).normal(0, 0.01, rows))))
+
+def timed(function, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return {"median": statistics.median(times), "min": min(times), "repeat": repeat}
+
+def micro_benchmarks(sizes):
+    for rows in sizes:
+        close = make_close(rows)
+        df = pd.DataFrame({"open": close, "high": close, "low": close, "close": close, "volume": close})
+        repeat = 5 if rows < 1_000_000 else 2
+        yield f"trix[{rows}]", lambda close=close: Trix(close, 9, 21, "sma"), repeat
+        yield f"rma[{rows}]", lambda close=close: rma(close, 14), repeat
+        yield f"get_n_columns[{rows}]", lambda df=df: get_n_columns(df, ["close", "volume"], 2), repeat
+        yield f"lag_matrix[{rows} x 20 lags]", lambda df=df: LagMatrix(df, ["close", "volume"], 20).view(range(1, 21)), repeat
+        yield f"lag_frame[{rows} x 20 lags]", lambda df=df: LagMatrix(df, ["close", "volume"], 20).frame(), repeat
+
+        exchange = PerpExchange("bybit")
+        exchange._session = PagedSession(rows)
+        # Seul l'assemblage est mesuré, pas le débit autorisé par Bybit
+        exchange.scheduler = RequestScheduler(
+            groups={name: (priority, 1e9, 1e9) for name, (priority, _, _) in ENDPOINT_GROUPS.items()},
+            max_concurrency=1000,
+        )
+        end_ts = int(datetime.datetime.now().timestamp() * 1000)
+        start_ts = end_ts - rows * TIMEFRAME_MS["1m"]
+        yield (
+            f"ohlcv_assembly[{rows}]",
+            lambda exchange=exchange, start_ts=start_ts, end_ts=end_ts: asyncio.run(
+                exchange._fetch_ohlcv_range("BTCUSDT", "1m", start_ts, end_ts)
+            ),
+            repeat,
+        )
+
+def market_benchmarks(sizes):
+    for pairs, candles in sizes:
+        for model in ["gbm", "regime", "jump"]:
+            yield (
+                f"synthetic_market[{model} {pairs}x{candles}]",
+                lambda pairs=pairs, candles=candles, model=model: sum(
+                    block.shape[2] for _, block in SyntheticMarket(pairs, "1m", model=model).chunks(candles)
+                ),
+                3,
+            )
+
+def make_params(pairs):
+    base = strategy.PARAMS["2h"]
+    return {
+        "2h": {
+            param: {f"PAIR{i}USDT": dict(next(iter(configs.values()))) for i in range(pairs)}
+            for param, configs in base.items()
+        }
+    }
+
+def macro_benchmarks(pair_counts, workdir):
+    strategy.RELATIVE_PATH = workdir
+    for pairs in pair_counts:
+        params = make_params(pairs)
+        market = SyntheticMarket(list(params["2h"]["p1"]), "2h", model="regime", seed=0)
+        exchange = SimExchange.from_market(market, 5000)
+
+        def run(params=params, exchange=exchange):
+            strategy.PARAMS = params
+            asyncio.run(strategy.run_strategy(exchange, QuietLogger(), account_name="benchmark"))
+            exchange.advance("2h")
+
+        # Premier passage hors mesure : marchés chargés et levier posé
+        run()
+        yield f"strategy_cycle[{pairs} pairs]", run, 3 if pairs < 500 else 1
+
+def startup_benchmarks():
+    # Interpréteur neuf à chaque mesure : les imports ne sont pas déjà en cache dans sys.modules
+    repo = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [repo, env.get("PYTHONPATH")]))
+    for name, code in [
+        ("cold_start[import]", "import trix_multi_bybit"),
+        ("cold_start[bybit session]", "import trix_multi_bybit; trix_multi_bybit.PerpExchange('bybit')"),
+    ]:
+        command = [sys.executable, "-W", "ignore", "-c", code]
+        yield name, lambda command=command: subprocess.run(command, env=env, check=True), 5
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        # Best-of-N time is far less noisy than the median on a shared VPS
+        ratio = result["min"] / baseline[name]["min"]
+        if ratio > 1 + tolerance:
+            regressions.append((name, ratio))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Startup, indicator, data assembly, synthetic market and strategy cycle benchmarks")
+    parser.add_argument("--output", default="benchmark_results.json", help="where to write this run's results")
+    parser.add_argument("--baseline", help="baseline JSON to compare against")
+    parser.add_argument("--save-baseline", help="also write the results to this baseline path")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="allowed slowdown ratio before flagging")
+    parser.add_argument("--quick", action="store_true", help="skip the largest sizes")
+    args = parser.parse_args()
+
+    sizes = MICRO_SIZES[:-1] if args.quick else MICRO_SIZES
+    pair_counts = MACRO_PAIRS[:-1] if args.quick else MACRO_PAIRS
+    market_sizes = MARKET_SIZES[:-1] if args.quick else MARKET_SIZES
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        benchmarks = (
+            list(startup_benchmarks())
+            + list(micro_benchmarks(sizes))
+            + list(market_benchmarks(market_sizes))
+            + list(macro_benchmarks(pair_counts, workdir))
+        )
+        for name, function, repeat in benchmarks:
+            results[name] = timed(function, repeat)
+            print(f"{name:<40} {results[name]['median'] * 1000:>10.2f} ms")
+
+    report = {
+        "timestamp": datetime.datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "results": results,
+    }
+    for path in [args.output, args.save_baseline]:
+        if path:
+            with open(path, "w") as f:
+                json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.tolerance)
+        for name, ratio in regressions:
+            print(f"REGRESSION {name}: {ratio:.2f}x baseline")
+        if regressions:
+            sys.exit(1)
+        print("No regression against baseline")
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,9 @@
+import json
+import math
+import os
 import numpy as np
 import pandas as pd
-import ta
+from numpy.lib.stride_tricks import sliding_window_view
 
 def get_n_columns(df, columns, n=1):
     dt = df.copy()
@@ -29,6 +32,8 @@ class Trix:
         self._run()
 
     def _run(self):
+        # ta ne sert qu'à cette implémentation de référence, trix_batch n'en dépend pas
+        import ta
         self.trix_line = ta.trend.ema_indicator(
             ta.trend.ema_indicator(
                 ta.trend.ema_indicator(
@@ -54,4 +59,316 @@ class Trix:
         return pd.Series(self.trix_signal_line, name="trix_signal_line")
 
     def get_trix_histo(self) -> pd.Series:
-        return pd.Series(self.trix_histo, name="trix_histo")
\ No newline at end of file
+        return pd.Series(self.trix_histo, name="trix_histo")
+
+class StreamingEma:
+    """Recursive EMA state, same values as ta.trend.ema_indicator (pandas ewm, adjust=False)."""
+
+    def __init__(self, window: int):
+        self.window = window
+        com = (window - 1) / 2.0
+        self.alpha = 1.0 / (1.0 + com)
+        self.weighted = np.nan
+        self.old_wt = 1.0
+        self.nobs = 0
+
+    def update(self, value: float) -> float:
+        is_observation = bool(value == value)
+        self.nobs += is_observation
+        if self.weighted == self.weighted:
+            self.old_wt *= 1.0 - self.alpha
+            if is_observation:
+                if self.weighted != value:
+                    self.weighted = self.old_wt * self.weighted + self.alpha * value
+                    self.weighted /= self.old_wt + self.alpha
+                self.old_wt = 1.0
+        elif is_observation:
+            self.weighted = value
+        return self.weighted if self.nobs >= self.window else np.nan
+
+    def to_dict(self) -> dict:
+        return {"window": self.window, "weighted": self.weighted, "old_wt": self.old_wt, "nobs": self.nobs}
+
+    @classmethod
+    def from_dict(cls, state: dict):
+        ema = cls(state["window"])
+        ema.weighted = state["weighted"]
+        ema.old_wt = state["old_wt"]
+        ema.nobs = state["nobs"]
+        return ema
+
+
+class StreamingSma:
+    """Ring buffer SMA, same values as ta.trend.sma_indicator (pandas rolling mean)."""
+
+    def __init__(self, window: int):
+        self.window = window
+        self.buffer = [np.nan] * window
+        self.position = 0
+        self.count = 0
+        self.nobs = 0
+        self.sum_x = 0.0
+        self.compensation_add = 0.0
+        self.compensation_remove = 0.0
+        self.neg_ct = 0
+        self.prev_value = np.nan
+        self.num_consecutive_same_value = 0
+
+    def update(self, value: float) -> float:
+        # Kahan summation in the same order as pandas' roll_mean so results are bit-identical
+        if self.count == 0:
+            self.prev_value = value
+        if self.count >= self.window:
+            old = self.buffer[self.position]
+            if old == old:
+                self.nobs -= 1
+                y = -old - self.compensation_remove
+                t = self.sum_x + y
+                self.compensation_remove = t - self.sum_x - y
+                self.sum_x = t
+                if old < 0 or (old == 0 and math.copysign(1, old) < 0):
+                    self.neg_ct -= 1
+        if value == value:
+            self.nobs += 1
+            y = value - self.compensation_add
+            t = self.sum_x + y
+            self.compensation_add = t - self.sum_x - y
+            self.sum_x = t
+            if value < 0 or (value == 0 and math.copysign(1, value) < 0):
+                self.neg_ct += 1
+            if value == self.prev_value:
+                self.num_consecutive_same_value += 1
+            else:
+                self.num_consecutive_same_value = 1
+            self.prev_value = value
+        self.buffer[self.position] = value
+        self.position = (self.position + 1) % self.window
+        self.count += 1
+        return self._mean()
+
+    def _mean(self) -> float:
+        if self.nobs >= self.window and self.nobs > 0:
+            if self.num_consecutive_same_value >= self.nobs:
+                return self.prev_value
+            result = self.sum_x / self.nobs
+            if self.neg_ct == 0 and result < 0:
+                return 0.0
+            if self.neg_ct == self.nobs and result > 0:
+                return 0.0
+            return result
+        return np.nan
+
+    def to_dict(self) -> dict:
+        return {key: getattr(self, key) for key in vars(self)}
+
+    @classmethod
+    def from_dict(cls, state: dict):
+        sma = cls(state["window"])
+        for key, value in state.items():
+            setattr(sma, key, value)
+        return sma
+
+
+class StreamingTrix:
+    """Incremental Trix: seed once with from_history(), then update() with each closed candle in O(1)."""
+
+    def __init__(
+        self,
+        trix_length: int = 9,
+        trix_signal_length: int = 21,
+        trix_signal_type: str = "sma",
+        long_ma_length: int = None,
+    ):
+        self.trix_length = trix_length
+        self.trix_signal_length = trix_signal_length
+        self.trix_signal_type = trix_signal_type
+        self.long_ma_length = long_ma_length
+        self.trix_emas = [StreamingEma(trix_length) for _ in range(3)]
+        if trix_signal_type == "sma":
+            self.signal = StreamingSma(trix_signal_length)
+        elif trix_signal_type == "ema":
+            self.signal = StreamingEma(trix_signal_length)
+        else:
+            raise ValueError(f"Unknown trix_signal_type: {trix_signal_type}")
+        self.long_ma = StreamingEma(long_ma_length) if long_ma_length else None
+        self.prev_trix_line = np.nan
+        self.last_timestamp = None
+        self.last = {}
+
+    def update(self, close: float, timestamp: int = None) -> dict:
+        close = float(close)
+        trix_line = close
+        for ema in self.trix_emas:
+            trix_line = ema.update(trix_line)
+        trix_pct_line = (trix_line / self.prev_trix_line - 1) * 100
+        self.prev_trix_line = trix_line
+        trix_signal_line = self.signal.update(trix_pct_line)
+        self.last = {
+            "trix_line": trix_line,
+            "trix_pct_line": trix_pct_line,
+            "trix_signal_line": trix_signal_line,
+            "trix_histo": trix_pct_line - trix_signal_line,
+        }
+        if self.long_ma is not None:
+            self.last["long_ma"] = self.long_ma.update(close)
+        if timestamp is not None:
+            self.last_timestamp = timestamp
+        return self.last
+
+    @classmethod
+    def from_history(cls, close: pd.Series, **kwargs):
+        trix = cls(**kwargs)
+        timestamps = close.index if isinstance(close.index, pd.DatetimeIndex) else [None] * len(close)
+        for timestamp, value in zip(timestamps, close.to_numpy(dtype="float64")):
+            trix.update(value, None if timestamp is None else int(timestamp.value // 1_000_000))
+        return trix
+
+    def to_dict(self) -> dict:
+        return {
+            "trix_length": self.trix_length,
+            "trix_signal_length": self.trix_signal_length,
+            "trix_signal_type": self.trix_signal_type,
+            "long_ma_length": self.long_ma_length,
+            "trix_emas": [ema.to_dict() for ema in self.trix_emas],
+            "signal": self.signal.to_dict(),
+            "long_ma": self.long_ma.to_dict() if self.long_ma is not None else None,
+            "prev_trix_line": self.prev_trix_line,
+            "last_timestamp": self.last_timestamp,
+            "last": self.last,
+        }
+
+    @classmethod
+    def from_dict(cls, state: dict):
+        trix = cls(
+            trix_length=state["trix_length"],
+            trix_signal_length=state["trix_signal_length"],
+            trix_signal_type=state["trix_signal_type"],
+            long_ma_length=state["long_ma_length"],
+        )
+        trix.trix_emas = [StreamingEma.from_dict(ema) for ema in state["trix_emas"]]
+        signal_class = StreamingSma if trix.trix_signal_type == "sma" else StreamingEma
+        trix.signal = signal_class.from_dict(state["signal"])
+        if state["long_ma"] is not None:
+            trix.long_ma = StreamingEma.from_dict(state["long_ma"])
+        trix.prev_trix_line = state["prev_trix_line"]
+        trix.last_timestamp = state["last_timestamp"]
+        trix.last = state["last"]
+        return trix
+
+    def save(self, path: str):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.to_dict(), f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str):
+        with open(path, "r") as f:
+            return cls.from_dict(json.load(f))
+
+
+def _ema_block(values: np.ndarray, window: int) -> np.ndarray:
+    # ta.trend.ema_indicator applied to every column of a 2-D block in one call
+    return pd.DataFrame(values, copy=False).ewm(span=window, min_periods=window, adjust=False).mean().to_numpy()
+
+
+def _sma_block(values: np.ndarray, window: int) -> np.ndarray:
+    return pd.DataFrame(values, copy=False).rolling(window, min_periods=window).mean().to_numpy()
+
+
+def trix_batch(close, trix_lengths, trix_signal_lengths, trix_signal_types) -> np.ndarray:
+    """Trix for many configurations of one close series in a single pass.
+
+    Returns an array of shape (len(close), 3 * k) for k configurations: columns [0, k) hold the
+    trix_pct lines, [k, 2k) the signal lines and [2k, 3k) the histograms, so
+    ``out.reshape(len(close), 3, k)`` gives one plane per output. Values are identical to Trix.
+    """
+    close = np.asarray(close, dtype="float64")
+    trix_lengths = np.asarray(trix_lengths)
+    trix_signal_lengths = np.asarray(trix_signal_lengths)
+    trix_signal_types = np.asarray(trix_signal_types)
+    n, k = len(close), len(trix_lengths)
+    unknown = set(trix_signal_types.tolist()) - {"sma", "ema"}
+    if unknown:
+        raise ValueError(f"Unknown trix_signal_type: {unknown.pop()}")
+
+    # The triple EMA only depends on trix_length and each signal only on its window: run the
+    # pandas kernels once per distinct value over 2-D blocks instead of once per configuration
+    lengths, length_index = np.unique(trix_lengths, return_inverse=True)
+    unique_trix_pct = np.empty((n, len(lengths)), order="F")
+    for i, length in enumerate(lengths):
+        trix_line = close[:, None]
+        for _ in range(3):
+            trix_line = _ema_block(trix_line, length)
+        trix_line = trix_line[:, 0]
+        unique_trix_pct[0, i] = np.nan
+        unique_trix_pct[1:, i] = (trix_line[1:] / trix_line[:-1] - 1) * 100
+
+    out = np.empty((n, 3 * k), order="F")
+    trix_pct = out[:, :k]
+    trix_signal = out[:, k:2 * k]
+    trix_pct[:] = unique_trix_pct[:, length_index]
+    for signal_type, signal_function in (("sma", _sma_block), ("ema", _ema_block)):
+        for signal_length in np.unique(trix_signal_lengths[trix_signal_types == signal_type]):
+            columns = np.nonzero((trix_signal_types == signal_type) & (trix_signal_lengths == signal_length))[0]
+            trix_signal[:, columns] = signal_function(trix_pct[:, columns], signal_length)
+    np.subtract(trix_pct, trix_signal, out=out[:, 2 * k:])
+    return out
+
+
+def ema_batch(close, windows) -> np.ndarray:
+    """ta.trend.ema_indicator of one close series for several windows, shape (len(close), len(windows))."""
+    close = np.asarray(close, dtype="float64")[:, None]
+    out = np.empty((len(close), len(windows)), order="F")
+    for window in np.unique(windows):
+        out[:, np.asarray(windows) == window] = _ema_block(close, window)
+    return out
+
+
+class LagMatrix:
+    """Lags 0 to max_lag of several columns as strided views over one buffer.
+
+    The selected columns are copied once into a contiguous (columns, max_lag + len(df)) float64
+    buffer, each preceded by max_lag NaN; the lag k of a column is the window of len(df) values
+    starting k places earlier, so building more lags allocates nothing. Lags are named
+    "n{lag}_{column}" like get_n_columns.
+    """
+
+    def __init__(self, df: pd.DataFrame, columns, max_lag: int):
+        if max_lag < 0:
+            raise ValueError(f"max_lag must be zero or more, got {max_lag}")
+        self.index = df.index
+        self.columns = list(columns)
+        self.max_lag = max_lag
+        self.buffer = np.full((len(self.columns), max_lag + len(df)), np.nan)
+        for i, col in enumerate(self.columns):
+            self.buffer[i, max_lag:] = df[col].to_numpy(dtype="float64")
+        # [column, row, lag] : la dernière dimension inversée met le décalage k à l'indice k
+        self._windows = sliding_window_view(self.buffer, max_lag + 1, axis=1)[:, :, ::-1]
+
+    def _check_lags(self, lags):
+        # Un indice négatif reviendrait par la fin de l'axe des décalages sans erreur
+        lags = np.asarray(lags)
+        if lags.size and (lags.min() < 0 or lags.max() > self.max_lag):
+            raise ValueError(f"lags must be between 0 and max_lag={self.max_lag}, got {lags.tolist()}")
+        return lags
+
+    def lag(self, column: str, n: int = 1) -> np.ndarray:
+        self._check_lags([n])
+        return self._windows[self.columns.index(column), :, n]
+
+    def view(self, lags=None) -> np.ndarray:
+        """(len(df), columns, lags) array of the lags, a view when they are evenly spaced."""
+        lags = np.arange(self.max_lag + 1) if lags is None else self._check_lags(lags)
+        if len(lags) > 1 and len(set(np.diff(lags))) == 1 and lags[1] > lags[0]:
+            selected = self._windows[:, :, lags[0]:lags[-1] + 1:lags[1] - lags[0]]
+        else:
+            selected = self._windows[:, :, lags]
+        return selected.transpose(1, 0, 2)
+
+    def frame(self, lags=None) -> pd.DataFrame:
+        """DataFrame of the lags of every column (one allocation), lag by lag."""
+        lags = list(range(1, self.max_lag + 1)) if lags is None else list(lags)
+        values = self.view(lags).transpose(0, 2, 1).reshape(len(self.index), len(lags) * len(self.columns))
+        names = [f"n{lag}_{col}" for lag in lags for col in self.columns]
+        return pd.DataFrame(values, index=self.index, columns=names)
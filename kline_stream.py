@@ -0,0 +1,353 @@
+import asyncio
+import itertools
+import json
+import time
+import aiohttp
+import numpy as np
+import pandas as pd
+from aiohttp import web
+from utilities.ohlcv_store import OHLCV_COLUMNS, to_ms
+from utilities.perp_exchange import TIMEFRAME_MS
+
+BYBIT_KLINE_URL = "wss://stream.bybit.com/v5/public/linear"
+KLINE_INTERVALS = {"1m": "1", "5m": "5", "15m": "15", "1h": "60", "2h": "120", "4h": "240", "1d": "D"}
+PING_INTERVAL = 20  # secondes, Bybit coupe une connexion muette au bout de 10 minutes
+SUBSCRIBE_BATCH = 10  # topics par requête subscribe
+MAX_RECONNECT_DELAY = 60
+
+def kline_topic(pair, timeframe):
+    return f"kline.{KLINE_INTERVALS[timeframe]}.{pair}"
+
+class CandleBuffer:
+    """Last `capacity` candles of one pair/timeframe, in get_last_ohlcv() order: the candle in
+    progress last, with high = low = close = open and no volume right after a close."""
+
+    def __init__(self, timeframe, capacity):
+        self.tf_ms = TIMEFRAME_MS[timeframe]
+        self.capacity = capacity
+        # Deux fois la capacité : une compaction toutes les `capacity` bougies au lieu d'un décalage par bougie
+        self._ts = np.empty(2 * capacity, dtype="int64")
+        self._values = np.empty((5, 2 * capacity))
+        self._start = 0
+        self._end = 0
+
+    def __len__(self):
+        return self._end - self._start
+
+    @property
+    def last_ts(self):
+        return int(self._ts[self._end - 1]) if self._end > self._start else None
+
+    def load(self, df):
+        df = df.tail(self.capacity)
+        self._ts[:len(df)] = to_ms(df.index)
+        self._values[:, :len(df)] = df[OHLCV_COLUMNS].to_numpy(dtype="float64").T
+        self._start = 0
+        self._end = len(df)
+
+    def _append(self, start_ts, values):
+        if self._end == len(self._ts):
+            keep = self.capacity - 1
+            self._ts[:keep] = self._ts[self._end - keep:self._end]
+            self._values[:, :keep] = self._values[:, self._end - keep:self._end]
+            self._start = 0
+            self._end = keep
+        self._ts[self._end] = start_ts
+        self._values[:, self._end] = values
+        self._end += 1
+        if self._end - self._start > self.capacity:
+            self._start += 1
+
+    def update(self, start_ts, values, confirm):
+        """Apply one kline update (values in OHLCV_COLUMNS order).
+
+        Returns False, without applying it, when candles are missing before it.
+        """
+        last_ts = self.last_ts
+        if last_ts is not None and start_ts < last_ts:
+            return True
+        if start_ts == last_ts:
+            self._values[:, self._end - 1] = values
+        elif last_ts is not None and start_ts > last_ts + self.tf_ms:
+            return False
+        else:
+            self._append(start_ts, values)
+        if confirm:
+            close = values[3]
+            self._append(start_ts + self.tf_ms, (close, close, close, close, 0.0))
+        return True
+
+    def frame(self, limit=None):
+        start = self._start if limit is None else max(self._start, self._end - limit)
+        df = pd.DataFrame(
+            self._values[:, start:self._end].T.copy(),
+            index=pd.to_datetime(self._ts[start:self._end], unit="ms"),
+            columns=OHLCV_COLUMNS,
+        )
+        df.index.name = "date"
+        return df
+
+class KlineStream:
+    """Bybit v5 kline subscription keeping a CandleBuffer per (pair, timeframe).
+
+    `subscriptions` maps (pair, timeframe) to the number of candles to keep. At each connection, and
+    when candles were missed, the buffers are reloaded with `seed(pair, timeframe, limit)` (REST).
+    on_close(close_ts, keys) is awaited, one call at a time, as soon as every subscription ending at
+    close_ts has confirmed its candle, or `settle` seconds after the first confirmation. A dropped
+    connection is reopened with exponential backoff when `reconnect`, otherwise run() returns once
+    the server closes it and the pending closes are handled.
+    """
+
+    def __init__(self, url, subscriptions, seed, on_close, settle=2.0, reconnect=True, ping_interval=PING_INTERVAL, metrics=None):
+        self.url = url
+        self.seed = seed
+        self.on_close = on_close
+        self.settle = settle
+        self.reconnect = reconnect
+        self.ping_interval = ping_interval
+        self.metrics = metrics
+        self.buffers = {(pair, timeframe): CandleBuffer(timeframe, limit) for (pair, timeframe), limit in subscriptions.items()}
+        self._topics = {kline_topic(pair, timeframe): (pair, timeframe) for pair, timeframe in self.buffers}
+        self._pending = {}
+        self._timers = {}
+        self._last_close = 0
+        self._closes = None
+
+    def _increment(self, name):
+        if self.metrics is not None:
+            self.metrics.increment(name)
+
+    async def run(self):
+        self._closes = asyncio.Queue()
+        listener = asyncio.ensure_future(self._listen_forever())
+        consumer = asyncio.ensure_future(self._consume())
+        try:
+            await asyncio.wait([listener, consumer], return_when=asyncio.FIRST_COMPLETED)
+            if consumer.done():
+                # on_close a levé une exception : elle remonte à l'appelant
+                return consumer.result()
+            listener.result()
+            for close_ts in sorted(self._pending):
+                self._fire(close_ts)
+            self._closes.put_nowait(None)
+            await consumer
+        finally:
+            listener.cancel()
+            consumer.cancel()
+            for timer in self._timers.values():
+                timer.cancel()
+            self._timers.clear()
+
+    async def _listen_forever(self):
+        delay = 1.0
+        async with aiohttp.ClientSession() as session:
+            while True:
+                try:
+                    await self._listen(session)
+                    delay = 1.0
+                except (aiohttp.ClientError, asyncio.TimeoutError, ConnectionError):
+                    if not self.reconnect:
+                        raise
+                    self._increment("stream.errors")
+                if not self.reconnect:
+                    return
+                self._increment("stream.reconnects")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, MAX_RECONNECT_DELAY)
+
+    async def _listen(self, session):
+        async with session.ws_connect(self.url) as ws:
+            topics = list(self._topics)
+            for i in range(0, len(topics), SUBSCRIBE_BATCH):
+                await ws.send_json({"op": "subscribe", "args": topics[i:i + SUBSCRIBE_BATCH]})
+            # Abonné d'abord : les mises à jour reçues pendant le chargement REST attendent dans la socket
+            await asyncio.gather(*[self._reload(key) for key in self.buffers])
+            pinger = asyncio.ensure_future(self._ping(ws))
+            try:
+                async for message in ws:
+                    if message.type == aiohttp.WSMsgType.TEXT:
+                        await self._handle(json.loads(message.data))
+                    elif message.type == aiohttp.WSMsgType.ERROR:
+                        raise ws.exception()
+            finally:
+                pinger.cancel()
+
+    async def _ping(self, ws):
+        while True:
+            await asyncio.sleep(self.ping_interval)
+            await ws.send_json({"op": "ping"})
+
+    async def _reload(self, key):
+        buffer = self.buffers[key]
+        buffer.load(await self.seed(key[0], key[1], buffer.capacity))
+        self._increment("stream.reloads")
+
+    async def _handle(self, message):
+        if "topic" not in message:
+            if message.get("op") == "subscribe" and not message.get("success", True):
+                raise ValueError(f"Kline subscription refused: {message.get('ret_msg')}")
+            return
+        key = self._topics.get(message["topic"])
+        if key is None:
+            return
+        self._increment("stream.messages")
+        buffer = self.buffers[key]
+        for kline in message["data"]:
+            start_ts = int(kline["start"])
+            values = [float(kline[col]) for col in OHLCV_COLUMNS]
+            if not buffer.update(start_ts, values, kline["confirm"]):
+                # Bougies manquées (reconnexion, message perdu) : on recharge puis on réapplique
+                await self._reload(key)
+                buffer.update(start_ts, values, kline["confirm"])
+            if kline["confirm"]:
+                self._confirmed(key, start_ts + buffer.tf_ms)
+
+    def _confirmed(self, key, close_ts):
+        if close_ts <= self._last_close:
+            return
+        confirmed = self._pending.setdefault(close_ts, set())
+        confirmed.add(key)
+        expected = {other for other in self.buffers if close_ts % TIMEFRAME_MS[other[1]] == 0}
+        if confirmed >= expected:
+            self._fire(close_ts)
+        elif close_ts not in self._timers:
+            self._timers[close_ts] = asyncio.get_running_loop().call_later(self.settle, self._fire, close_ts)
+
+    def _fire(self, close_ts):
+        keys = self._pending.pop(close_ts, set())
+        timer = self._timers.pop(close_ts, None)
+        if timer is not None:
+            timer.cancel()
+        if close_ts <= self._last_close:
+            return
+        self._last_close = close_ts
+        self._closes.put_nowait((close_ts, keys))
+
+    async def _consume(self):
+        while True:
+            item = await self._closes.get()
+            if item is None:
+                return
+            close_ts, keys = item
+            if self.metrics is not None:
+                with self.metrics.span("stream.on_close"):
+                    await self.on_close(close_ts, keys)
+            else:
+                await self.on_close(close_ts, keys)
+
+class KlineReplayServer:
+    """Local stand-in for the Bybit v5 public websocket, replaying candles as kline topics.
+
+    `candles` is {(pair, timeframe): DataFrame}. From the first subscription of a connection, the
+    candles starting at or after the candle holding `start_ts` are played in close time order, one
+    close time every `interval` seconds: `updates` in-progress messages walking from the open to the
+    close, then the confirmed candle. The server closes the connection at the end of the replay.
+    Subscribe and ping requests get Bybit's replies.
+    """
+
+    def __init__(self, candles, start_ts, interval=0.1, updates=2, host="127.0.0.1", port=0):
+        self.interval = interval
+        self.updates = updates
+        self.host = host
+        self.port = port
+        self.url = None
+        self._runner = None
+        self._connections = itertools.count()
+        self._timelines = {}
+        for (pair, timeframe), df in candles.items():
+            tf_ms = TIMEFRAME_MS[timeframe]
+            ts = to_ms(df.index)
+            keep = ts >= start_ts - start_ts % tf_ms
+            self._timelines[kline_topic(pair, timeframe)] = (timeframe, ts[keep], df[OHLCV_COLUMNS].to_numpy(dtype="float64")[keep])
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get("/v5/public/linear", self._handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        self.url = f"ws://{self.host}:{self._runner.addresses[0][1]}/v5/public/linear"
+        return self.url
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _handle(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        conn_id = str(next(self._connections))
+        topics = []
+        replay = None
+        try:
+            async for message in ws:
+                if message.type != aiohttp.WSMsgType.TEXT:
+                    continue
+                payload = json.loads(message.data)
+                if payload.get("op") == "ping":
+                    await ws.send_json({"success": True, "ret_msg": "pong", "conn_id": conn_id, "op": "ping"})
+                elif payload.get("op") == "subscribe":
+                    unknown = [topic for topic in payload.get("args", []) if topic not in self._timelines]
+                    topics += [topic for topic in payload.get("args", []) if topic in self._timelines]
+                    await ws.send_json({
+                        "success": not unknown,
+                        "ret_msg": f"Invalid topic: {unknown}" if unknown else "",
+                        "conn_id": conn_id,
+                        "req_id": payload.get("req_id", ""),
+                        "op": "subscribe",
+                    })
+                    if replay is None:
+                        replay = asyncio.ensure_future(self._replay(ws, topics))
+        finally:
+            if replay is not None:
+                replay.cancel()
+        return ws
+
+    async def _replay(self, ws, topics):
+        # Laisse arriver les autres paquets de subscribe de la connexion
+        await asyncio.sleep(self.interval)
+        events = sorted(
+            (int(ts) + TIMEFRAME_MS[self._timelines[topic][0]], topic, i)
+            for topic in set(topics)
+            for i, ts in enumerate(self._timelines[topic][1])
+        )
+        for _, group in itertools.groupby(events, key=lambda event: event[0]):
+            group = list(group)
+            for step in range(1, self.updates + 1):
+                for _, topic, i in group:
+                    await ws.send_json(self._message(topic, i, step / (self.updates + 1), False))
+                await asyncio.sleep(self.interval / (self.updates + 1))
+            for _, topic, i in group:
+                await ws.send_json(self._message(topic, i, 1.0, True))
+            await asyncio.sleep(self.interval / (self.updates + 1))
+        await ws.close()
+
+    def _message(self, topic, i, progress, confirm):
+        timeframe, ts, values = self._timelines[topic]
+        open, high, low, close, volume = values[i]
+        if not confirm:
+            # Bougie en cours : le prix n'a parcouru qu'une partie du chemin vers la clôture
+            close = open + (close - open) * progress
+            high = max(open, close)
+            low = min(open, close)
+            volume *= progress
+        now = int(time.time() * 1000)
+        return {
+            "topic": topic,
+            "type": "snapshot",
+            "ts": now,
+            "data": [{
+                "start": int(ts[i]),
+                "end": int(ts[i]) + TIMEFRAME_MS[timeframe] - 1,
+                "interval": KLINE_INTERVALS[timeframe],
+                "open": str(open),
+                "close": str(close),
+                "high": str(high),
+                "low": str(low),
+                "volume": str(volume),
+                "turnover": str(volume * close),
+                "confirm": confirm,
+                "timestamp": now,
+            }],
+        }
@@ -0,0 +1,56 @@
+import functools
+import numpy as np
+
+LOOKBACK_TOLERANCE = 1e-4
+MAX_CONVERGENCE_STEPS = 100_000
+
+@functools.lru_cache(maxsize=None)
+def cascade_convergence(windows, tolerance=LOOKBACK_TOLERANCE):
+    """Steps after which the seed of a chain of EMAs (adjust=False) weighs less than `tolerance`.
+
+    Every stage starts from an error of 1 (relative to the price scale) and each stage also receives
+    the remaining error of the previous one, which bounds what starting the computation on a
+    truncated history changes compared to an infinite one.
+    """
+    alphas = np.array([2 / (window + 1) for window in windows])
+    error = np.ones(len(alphas))
+    for step in range(MAX_CONVERGENCE_STEPS):
+        if error[-1] < tolerance:
+            return step
+        previous = 0.0
+        for i, alpha in enumerate(alphas):
+            error[i] = (1 - alpha) * error[i] + alpha * previous
+            previous = error[i]
+    return MAX_CONVERGENCE_STEPS
+
+def ema_lookback(window, tolerance=LOOKBACK_TOLERANCE):
+    # ta masque les window - 1 premières valeurs, puis le seed doit s'effacer
+    return window - 1 + cascade_convergence((window,), tolerance)
+
+def trix_lookback(trix_length, trix_signal_length, trix_signal_type, tolerance=LOOKBACK_TOLERANCE):
+    # Chaque EMA démarre sur la première valeur de la précédente, puis pct_change consomme une bougie
+    warmup = 3 * (trix_length - 1) + 1 + trix_signal_length - 1
+    windows = (trix_length,) * 3
+    if trix_signal_type == "ema":
+        windows += (trix_signal_length,)
+    return warmup + cascade_convergence(windows, tolerance)
+
+def plan_lookback(configs, tolerance=LOOKBACK_TOLERANCE):
+    """Candles to request for the last closed candle of every config: the largest need of the
+    configs, plus the candle in progress and the closed one the decision is taken on.
+
+    What `tolerance` bounds is the weight of the truncated seed in each EMA, relative to the price
+    scale: the triple EMA and the long moving average are within `tolerance` (relative) of a
+    long-history computation. trix_pct is 100 times the ratio of two consecutive triple EMA values
+    minus 1, so it, the signal and the histogram only get an absolute bound, of the order of
+    100 * tolerance percentage points. There is no relative bound on them: the histogram crosses
+    zero, and a candle whose histogram lies within that band of zero may change sign.
+    """
+    needed = 0
+    for config in configs:
+        needed = max(
+            needed,
+            trix_lookback(config["trix_length"], config["trix_signal_length"], config["trix_signal_type"], tolerance),
+            ema_lookback(config["long_ma_length"], tolerance),
+        )
+    return needed + 2
@@ -0,0 +1,85 @@
+import contextlib
+import datetime
+import json
+import os
+import time
+from collections import defaultdict
+import numpy as np
+
+class Metrics:
+    """Timing spans and counters for one strategy run, exported as Prometheus text or JSON lines."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.spans = defaultdict(list)
+        self.counters = defaultdict(int)
+
+    @contextlib.contextmanager
+    def span(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.spans[name].append((time.perf_counter() - start) * 1000)
+
+    def increment(self, name, value=1):
+        self.counters[name] += value
+
+    def snapshot(self):
+        return {
+            "spans": {
+                name: {"count": len(durations), "sum_ms": sum(durations), "max_ms": max(durations)}
+                for name, durations in self.spans.items()
+            },
+            "counters": dict(self.counters),
+        }
+
+    def to_prometheus(self, prefix="trix"):
+        snapshot = self.snapshot()
+        lines = [
+            f"# HELP {prefix}_span_duration_seconds Time spent in each phase or exchange call during the last run",
+            f"# TYPE {prefix}_span_duration_seconds summary",
+        ]
+        for name, span in sorted(snapshot["spans"].items()):
+            lines.append(f'{prefix}_span_duration_seconds_sum{{span="{name}"}} {span["sum_ms"] / 1000:.6f}')
+            lines.append(f'{prefix}_span_duration_seconds_count{{span="{name}"}} {span["count"]}')
+        lines.append(f"# TYPE {prefix}_span_duration_seconds_max gauge")
+        for name, span in sorted(snapshot["spans"].items()):
+            lines.append(f'{prefix}_span_duration_seconds_max{{span="{name}"}} {span["max_ms"] / 1000:.6f}')
+        lines.append(f"# TYPE {prefix}_events_total counter")
+        for name, value in sorted(snapshot["counters"].items()):
+            lines.append(f'{prefix}_events_total{{event="{name}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+    def export(self, directory, name):
+        """Write <name>.prom for the last run and append the run to <name>.jsonl."""
+        os.makedirs(directory, exist_ok=True)
+        prom_path = os.path.join(directory, f"{name}.prom")
+        with open(prom_path + ".tmp", "w") as f:
+            f.write(self.to_prometheus())
+        os.replace(prom_path + ".tmp", prom_path)
+        with open(os.path.join(directory, f"{name}.jsonl"), "a") as f:
+            f.write(json.dumps({"timestamp": datetime.datetime.now().isoformat(), **self.snapshot()}) + "\n")
+
+def summarize(jsonl_path, last=None):
+    """p50/p95 of the per-run time of each span (and per-run counter values) across recorded runs."""
+    with open(jsonl_path, "r") as f:
+        runs = [json.loads(line) for line in f if line.strip()]
+    if last is not None:
+        runs = runs[-last:]
+    values = defaultdict(list)
+    for run in runs:
+        for name, span in run["spans"].items():
+            values[name].append(span["sum_ms"])
+        for name, value in run["counters"].items():
+            values[name].append(value)
+    return {
+        name: {
+            "runs": len(samples),
+            "p50": float(np.percentile(samples, 50)),
+            "p95": float(np.percentile(samples, 95)),
+        }
+        for name, samples in sorted(values.items())
+    }
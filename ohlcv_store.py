@@ -0,0 +1,98 @@
+import os
+import numpy as np
+import pandas as pd
+
+OHLCV_COLUMNS = ["open", "high", "low", "close", "volume"]
+
+class OhlcvStore:
+    """Candles stored as one columnar .npz file per exchange/pair/timeframe."""
+
+    def __init__(self, root_dir):
+        self.root_dir = root_dir
+
+    def path(self, exchange_name, pair, timeframe):
+        return os.path.join(self.root_dir, exchange_name, f"{pair.replace('/', '')}_{timeframe}.npz")
+
+    def load(self, exchange_name, pair, timeframe):
+        path = self.path(exchange_name, pair, timeframe)
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as data:
+            df = pd.DataFrame({col: data[col] for col in OHLCV_COLUMNS}, index=pd.to_datetime(data["date"], unit="ms"))
+        df.index.name = "date"
+        return df
+
+    def save(self, exchange_name, pair, timeframe, df):
+        path = self.path(exchange_name, pair, timeframe)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                date=to_ms(df.index),
+                **{col: df[col].to_numpy(dtype="float64") for col in OHLCV_COLUMNS},
+            )
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def missing_ranges(df, tf_ms, start_ts, end_ts):
+        """Return the [start, end] ms ranges that must be fetched to cover start_ts..end_ts.
+
+        The last stored candle is always refetched since it may have been stored while still open.
+        """
+        start_ts = start_ts - start_ts % tf_ms
+        if df is None or len(df) == 0:
+            return [(start_ts, end_ts)]
+        ts = to_ms(df.index)
+        ts = ts[ts >= start_ts]
+        if len(ts) == 0:
+            return [(start_ts, end_ts)]
+        ranges = []
+        if ts[0] > start_ts:
+            ranges.append((start_ts, ts[0] - tf_ms))
+        gaps = np.nonzero(np.diff(ts) > tf_ms)[0]
+        for i in gaps:
+            ranges.append((ts[i] + tf_ms, ts[i + 1] - tf_ms))
+        ranges.append((ts[-1], end_ts))
+        return ranges
+
+    @staticmethod
+    def merge(dfs):
+        dfs = [df for df in dfs if df is not None and len(df) > 0]
+        if len(dfs) == 0:
+            return pd.DataFrame(columns=OHLCV_COLUMNS, index=pd.DatetimeIndex([], name="date"))
+        df = pd.concat(dfs)
+        # Freshly fetched candles replace stored ones
+        df = df[~df.index.duplicated(keep="last")]
+        return df.sort_index()
+
+def to_ms(index):
+    return index.to_numpy(dtype="datetime64[ms]").astype("int64")
+
+def ohlcv_frame(pages):
+    """DataFrame from ccxt fetch_ohlcv pages ([[timestamp, open, high, low, close, volume], ...]).
+
+    Candles are decoded page by page into one preallocated (5, n) float64 block that the DataFrame
+    wraps without copying, then sorted and deduplicated by timestamp (the last page wins).
+    """
+    total = sum(len(page) for page in pages)
+    ts = np.empty(total, dtype="int64")
+    values = np.empty((len(OHLCV_COLUMNS), total), dtype="float64")
+    offset = 0
+    for i, page in enumerate(pages):
+        if len(page) == 0:
+            continue
+        decoded = np.asarray(page, dtype="float64")
+        ts[offset:offset + len(page)] = decoded[:, 0]
+        values[:, offset:offset + len(page)] = decoded[:, 1:6].T
+        offset += len(page)
+        pages[i] = None
+    if total > 1 and not np.all(ts[1:] > ts[:-1]):
+        order = np.argsort(ts, kind="stable")
+        ts = ts[order]
+        keep = np.append(ts[1:] != ts[:-1], True)
+        ts = ts[keep]
+        values = values[:, order[keep]]
+    df = pd.DataFrame(values.T, columns=OHLCV_COLUMNS, index=pd.to_datetime(ts, unit="ms"), copy=False)
+    df.index.name = "date"
+    return df
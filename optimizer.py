@@ -0,0 +1,188 @@
+import argparse
+import json
+import os
+import random
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+from utilities.backtest import GRID_KEYS, TrixBacktest, make_grid
+from utilities.ohlcv_store import OhlcvStore
+from utilities.sim_exchange import synthetic_ohlcv
+
+METRICS = ["pnl_pct", "max_drawdown_pct", "trades", "exposure_pct"]
+
+_worker_close = None
+_worker_memory = None
+
+def _attach(name, length):
+    # Chaque worker lit les clôtures dans le segment partagé, sans copie du DataFrame
+    global _worker_close, _worker_memory
+    _worker_memory = shared_memory.SharedMemory(name=name)
+    _worker_close = np.ndarray((length,), dtype="float64", buffer=_worker_memory.buf)
+
+def _run_task(task):
+    start, end, warmup, grid, options = task
+    df = pd.DataFrame({"close": _worker_close[start:end]})
+    return TrixBacktest(df, warmup=warmup, **options).run(grid)
+
+def random_grid(space, samples, seed=0):
+    """Draw `samples` distinct parameter sets from {key: list of candidate values}."""
+    rng = random.Random(seed)
+    grid = {}
+    size = int(np.prod([len(space[key]) for key in GRID_KEYS]))
+    while len(grid) < min(samples, size):
+        params = {key: rng.choice(list(space[key])) for key in GRID_KEYS}
+        grid[tuple(params.values())] = params
+    return list(grid.values())
+
+def walk_forward_splits(length, train, test, step=None):
+    """(train_start, train_end, test_start, test_end) windows rolling over `length` candles."""
+    step = step or test
+    splits = []
+    start = 0
+    while start + train + test <= length:
+        splits.append((start, start + train, start + train, start + train + test))
+        start += step
+    if not splits:
+        raise ValueError(f"{length} candles cannot hold a {train} + {test} walk-forward split")
+    return splits
+
+class TrixOptimizer:
+    """Grid or random search of the Trix strategy over a process pool.
+
+    The close prices are copied once into a shared memory segment that every worker maps; each task
+    backtests a chunk of parameter sets (sorted so that a chunk shares its triple EMAs) over one
+    window. `workers` defaults to every core.
+    """
+
+    def __init__(self, df, workers=None, chunk_size=64, warmup=600, sides=("long",), leverage=1.0, fee=0.0006):
+        self.close = df["close"].to_numpy(dtype="float64")
+        self.workers = workers or os.cpu_count()
+        self.chunk_size = chunk_size
+        self.warmup = warmup
+        self.options = {"sides": tuple(sides), "leverage": leverage, "fee": fee}
+
+    def _tasks(self, grid, windows):
+        grid = sorted(grid, key=lambda params: [params[key] for key in GRID_KEYS])
+        # Assez de tâches pour occuper chaque worker même quand la grille est petite
+        chunk_size = max(1, min(self.chunk_size, -(-len(grid) * len(windows) // (self.workers * 4))))
+        # Indice de la fenêtre : deux fenêtres identiques (test k et train k + 1) gardent leurs résultats
+        for position, window in enumerate(windows):
+            for i in range(0, len(grid), chunk_size):
+                yield position, window, grid[i:i + chunk_size]
+
+    def evaluate(self, grid, windows):
+        """Backtest every parameter set on every (start, end, warmup) window.
+
+        Returns one result table per window, in the order of `windows`.
+        """
+        memory = shared_memory.SharedMemory(create=True, size=max(self.close.nbytes, 1))
+        try:
+            np.ndarray(self.close.shape, dtype="float64", buffer=memory.buf)[:] = self.close
+            tasks = list(self._tasks(grid, windows))
+            with ProcessPoolExecutor(self.workers, initializer=_attach, initargs=(memory.name, len(self.close))) as pool:
+                results = list(pool.map(_run_task, [
+                    (start, end, warmup, chunk, self.options) for _, (start, end, warmup), chunk in tasks
+                ]))
+        finally:
+            memory.close()
+            memory.unlink()
+        tables = [[] for _ in windows]
+        for (position, _, _), result in zip(tasks, results):
+            tables[position].append(result)
+        return [pd.concat(table, ignore_index=True) for table in tables]
+
+    def run(self, grid, metric="pnl_pct"):
+        """Ranked results of every parameter set on the whole history."""
+        result = self.evaluate(grid, [(0, len(self.close), self.warmup)])[0]
+        return result.sort_values(metric, ascending=metric == "max_drawdown_pct", ignore_index=True)
+
+    def walk_forward(self, grid, train, test, step=None, metric="pnl_pct", top=10):
+        """Optimize on each train window and score its `top` sets on the following test window.
+
+        Returns the out-of-sample results of every fold (column "fold") and a ranking of the sets by
+        their mean test `metric` across the folds they were selected in.
+        """
+        splits = walk_forward_splits(len(self.close), train, test, step)
+        windows = []
+        for train_start, train_end, test_start, test_end in splits:
+            windows.append((train_start, train_end, min(self.warmup, train_end - train_start - 1)))
+            # Le test relit les bougies qui le précèdent pour démarrer avec des indicateurs chauds
+            warmup = min(self.warmup, test_start)
+            windows.append((test_start - warmup, test_end, warmup))
+        tables = self.evaluate(grid, windows)
+        ascending = metric == "max_drawdown_pct"
+        folds = []
+        for fold, (train_table, test_table) in enumerate(zip(tables[0::2], tables[1::2])):
+            best = train_table.sort_values(metric, ascending=ascending).head(top)[GRID_KEYS]
+            folds.append(best.merge(test_table, on=GRID_KEYS).assign(fold=fold))
+        folds = pd.concat(folds, ignore_index=True)
+        ranking = (
+            folds.groupby(GRID_KEYS, as_index=False)
+            .agg(**{f"mean_{name}": (name, "mean") for name in METRICS}, folds=("fold", "count"))
+            .sort_values([f"mean_{metric}", "folds"], ascending=[ascending, False], ignore_index=True)
+        )
+        return folds, ranking
+
+def params_block(best, timeframe, name="p1"):
+    """Python source of a PARAMS entry ({timeframe: {name: {pair: params}}}) from {pair: result row}."""
+    lines = ["PARAMS = {", f'    "{timeframe}": {{', f'        "{name}": {{']
+    for pair, row in best.items():
+        lines.append(f'            "{pair}": {{')
+        for key in GRID_KEYS:
+            value = json.dumps(row[key] if isinstance(row[key], str) else int(row[key]))
+            lines.append(f'                "{key}": {value},')
+        lines.append("            },")
+    lines += ["        },", "    },", "}"]
+    return "\n".join(lines)
+
+def parse_values(text):
+    # "7:45:2" -> range(7, 45, 2), "sma,ema" -> ["sma", "ema"], "300" -> [300]
+    if ":" in text:
+        return list(range(*[int(part) for part in text.split(":")]))
+    return [int(value) if value.isdigit() else value for value in text.split(",")]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Trix parameter search over a process pool")
+    parser.add_argument("--pairs", default="BTCUSDT,ETHUSDT")
+    parser.add_argument("--timeframe", default="2h")
+    parser.add_argument("--store", help="OhlcvStore directory to read the candles from (synthetic candles otherwise)")
+    parser.add_argument("--candles", type=int, default=20_000, help="synthetic candles per pair")
+    parser.add_argument("--trix-length", default="5:50")
+    parser.add_argument("--trix-signal-length", default="5:50")
+    parser.add_argument("--trix-signal-type", default="sma,ema")
+    parser.add_argument("--long-ma-length", default="300")
+    parser.add_argument("--random", type=int, help="sample this many sets instead of the full grid")
+    parser.add_argument("--walk-forward", help="train:test[:step] window sizes in candles")
+    parser.add_argument("--metric", default="pnl_pct", choices=METRICS)
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    space = {
+        "trix_length": parse_values(args.trix_length),
+        "trix_signal_length": parse_values(args.trix_signal_length),
+        "trix_signal_type": parse_values(args.trix_signal_type),
+        "long_ma_length": parse_values(args.long_ma_length),
+    }
+    grid = random_grid(space, args.random) if args.random else make_grid(*[space[key] for key in GRID_KEYS])
+    best = {}
+    for i, pair in enumerate(args.pairs.split(",")):
+        if args.store:
+            df = OhlcvStore(args.store).load("bybit", pair, args.timeframe)
+            if df is None:
+                sys.exit(f"No {args.timeframe} candles stored for {pair} in {args.store}")
+        else:
+            df = synthetic_ohlcv(args.timeframe, 1_700_000_000_000, args.candles, seed=i)
+        optimizer = TrixOptimizer(df, workers=args.workers)
+        if args.walk_forward:
+            folds, ranking = optimizer.walk_forward(grid, *[int(size) for size in args.walk_forward.split(":")], metric=args.metric, top=args.top)
+        else:
+            ranking = optimizer.run(grid, metric=args.metric)
+        print(f"--- {pair} {args.timeframe}: {len(grid)} sets ---")
+        print(ranking.head(args.top).to_string(index=False))
+        best[pair] = ranking.iloc[0]
+    print()
+    print(params_block(best, args.timeframe))
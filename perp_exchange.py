@@ -1,8 +1,22 @@
-import ccxt.async_support as ccxt
 import pandas as pd
 import asyncio
+import datetime
+import functools
+import importlib
+import importlib.machinery
+import importlib.util
+import json
+import os
+import platform
+import sys
+import time
+import types
 from pydantic import BaseModel
 from decimal import Decimal
+from typing import NamedTuple, Optional
+from utilities.metrics import Metrics
+from utilities.request_scheduler import RequestScheduler
+from utilities.ohlcv_store import ohlcv_frame
 
 class UsdtBalance(BaseModel):
     total: float
@@ -24,6 +38,7 @@ class Order(BaseModel):
     filled: float
     remaining: float
     timestamp: int
+    latency_ms: Optional[float] = None
 
 class Position(BaseModel):
     pair: str
@@ -41,30 +56,263 @@ class Position(BaseModel):
     take_profit_price: float
     stop_loss_price: float
 
+class PositionRecord(NamedTuple):
+    """Position parsed without validation from trusted exchange payloads (same fields as Position).
+
+    `pair` is in the strategy format, the one of PARAMS ("BTCUSDT" on Bybit).
+    """
+    pair: str
+    side: str
+    size: float
+    usd_size: float
+    entry_price: float
+    current_price: float
+    unrealizedPnl: float
+    liquidation_price: float
+    margin_mode: str
+    leverage: float
+    hedge_mode: bool
+    open_timestamp: int
+    take_profit_price: float
+    stop_loss_price: float
+
+def contracts_to_size(contracts, contract_size):
+    # Same rounding as the validated Decimal * Decimal -> float coercion
+    if contract_size == 1:
+        return float(contracts)
+    return float(Decimal(contracts) * Decimal(contract_size))
+
+def exposure_summary(positions):
+    """Long/short exposition and unrealized PnL of a position list, in a single pass."""
+    long_exposition = short_exposition = unrealized_pnl = 0.0
+    for position in positions:
+        if position.side == "long":
+            long_exposition += position.usd_size
+        elif position.side == "short":
+            short_exposition += position.usd_size
+        unrealized_pnl += position.unrealizedPnl
+    return {
+        "long_exposition": long_exposition,
+        "short_exposition": short_exposition,
+        "unrealized_pnl": unrealized_pnl,
+    }
+
+TIMEFRAME_MS = {
+    "1m": 1 * 60 * 1000,
+    "5m": 5 * 60 * 1000,
+    "15m": 15 * 60 * 1000,
+    "1h": 60 * 60 * 1000,
+    "2h": 2 * 60 * 60 * 1000,
+    "4h": 4 * 60 * 60 * 1000,
+    "1d": 24 * 60 * 60 * 1000,
+}
+MARKETS_CACHE_TTL = 24 * 60 * 60
+LEVERAGE_CACHE_TTL = 24 * 60 * 60
+
+def instrumented(function):
+    # Times every call of an exchange method in self.metrics under "exchange.<method>"
+    @functools.wraps(function)
+    async def wrapper(self, *args, **kwargs):
+        with self.metrics.span(f"exchange.{function.__name__}"):
+            return await function(self, *args, **kwargs)
+    return wrapper
+
+def _package_stub(name, path):
+    module = types.ModuleType(name)
+    module.__path__ = [path]
+    module.__spec__ = importlib.machinery.ModuleSpec(name, None, is_package=True)
+    module.__spec__.submodule_search_locations = [path]
+    sys.modules[name] = module
+    return module
+
+def load_exchange_class(exchange_name):
+    """Async ccxt class of `exchange_name`, importing only ccxt's base and that exchange.
+
+    `import ccxt.async_support` executes the sync and async __init__ of ccxt, which import their
+    ~200 exchange modules. When neither package is loaded yet, both are registered as bare package
+    modules for the time of the import (holding the error classes and Exchange that the exchange
+    modules import from ccxt), so that only base/ and the requested module run. The bare packages
+    are removed afterwards: a later `import ccxt` runs the real __init__, which reuses the loaded
+    base and exchange modules. Falls back to the full import otherwise.
+    """
+    if "ccxt" in sys.modules:
+        return getattr(importlib.import_module("ccxt.async_support"), exchange_name)
+    spec = importlib.util.find_spec("ccxt")
+    if spec is None:
+        raise ImportError("ccxt is not installed")
+    root = os.path.dirname(spec.origin)
+    stubs = [_package_stub("ccxt", root), _package_stub("ccxt.async_support", os.path.join(root, "async_support"))]
+    try:
+        errors = importlib.import_module("ccxt.base.errors")
+        for name in errors.__all__:
+            setattr(stubs[0], name, getattr(errors, name))
+        stubs[0].Exchange = importlib.import_module("ccxt.base.exchange").Exchange
+        return getattr(importlib.import_module(f"ccxt.async_support.{exchange_name}"), exchange_name)
+    except (ImportError, AttributeError):
+        # Agencement de ccxt inattendu : on retire les modules chargés sous les paquets vides
+        for name in [name for name in sys.modules if name == "ccxt" or name.startswith("ccxt.")]:
+            del sys.modules[name]
+        stubs = []
+        return getattr(importlib.import_module("ccxt.async_support"), exchange_name)
+    finally:
+        # Les paquets vides ne doivent pas masquer le vrai espace de noms de ccxt
+        for stub in stubs:
+            if sys.modules.get(stub.__name__) is stub:
+                del sys.modules[stub.__name__]
+
 class PerpExchange:
-    def __init__(self, exchange_name, public_api=None, secret_api=None, password=None):
-        self.exchange_name = exchange_name.lower()
+    def __init__(self, exchange_name, public_api=None, secret_api=None, password=None, ohlcv_store=None, markets_cache_path=None, markets_cache_ttl=MARKETS_CACHE_TTL, leverage_cache_path=None, leverage_cache_ttl=LEVERAGE_CACHE_TTL, max_concurrency=10, metrics=None):
+        self._init_state(exchange_name, ohlcv_store, markets_cache_path, markets_cache_ttl, leverage_cache_path, leverage_cache_ttl, metrics)
         self._auth = bool(public_api and secret_api)
         auth_object = {
             "apiKey": public_api,
             "secret": secret_api,
             "password": password,
-            "enableRateLimit": True,
+            # Le débit est réglé par self.scheduler, par groupe d'endpoints et par priorité
+            "enableRateLimit": False,
             "options": {"defaultType": "swap"}
         }
-        self._session = getattr(ccxt, exchange_name)(auth_object)
+        if self.exchange_name == "bybit":
+            # Only USDT perpetuals are traded, skip the spot, inverse and option catalogues
+            auth_object["options"]["fetchMarkets"] = ["linear"]
+        self._session = load_exchange_class(self.exchange_name)(auth_object)
+        self._count_http_requests()
+        errors = sys.modules["ccxt.base.errors"]
+        self.scheduler = RequestScheduler(
+            max_concurrency=max_concurrency,
+            retry_on=(errors.RateLimitExceeded, errors.DDoSProtection),
+            metrics=self.metrics,
+        )
+
+    def _init_state(self, exchange_name, ohlcv_store, markets_cache_path, markets_cache_ttl, leverage_cache_path, leverage_cache_ttl, metrics):
+        # État commun à PerpExchange et SimExchange, hors session ccxt et scheduler
+        self.exchange_name = exchange_name.lower()
+        self.metrics = metrics or Metrics()
+        self.ohlcv_store = ohlcv_store
+        self.markets_cache_path = markets_cache_path
+        self.markets_cache_ttl = markets_cache_ttl
+        self.leverage_cache_path = leverage_cache_path
+        self.leverage_cache_ttl = leverage_cache_ttl
+        self._leverage_state = self._read_leverage_cache()
+        self.market = None
+        self._market_index = {}
+        # Paires demandées mais absentes du catalogue, pour ne pas le retélécharger à chaque appel
+        self._missing_markets = set()
+        self.kline_stream = None
+
+    def _count_http_requests(self):
+        fetch = self._session.fetch
+
+        async def counted_fetch(*args, **kwargs):
+            self.metrics.increment("exchange.http_requests")
+            try:
+                return await fetch(*args, **kwargs)
+            except Exception:
+                self.metrics.increment("exchange.http_errors")
+                raise
+
+        self._session.fetch = counted_fetch
+
+    @instrumented
+    async def load_markets(self, pairs=None):
+        wanted = None if pairs is None else {self.normalize_pair(pair) for pair in pairs}
+        if self.market is not None and (wanted is None or wanted.issubset(self._market_index.keys() | self._missing_markets)):
+            return
+        if self.market and wanted is not None:
+            wanted |= {market["id"] for market in self.market.values()}
+        cached = self._read_markets_cache(wanted)
+        if cached is None:
+            markets = await self.scheduler.run("market", self._session.fetch_markets)
+            if wanted is not None:
+                markets = [market for market in markets if market["id"] in wanted or market["symbol"] in wanted]
+            missing = self._missing_ids(wanted, markets)
+            self._write_markets_cache(markets, missing)
+        else:
+            markets, missing = cached
+        self._missing_markets = missing
+        self._session.set_markets(markets)
+        self.market = {market["symbol"]: market for market in markets}
+        self._market_index = {}
+        for market in markets:
+            self._market_index[market["id"]] = market["symbol"]
+            self._market_index[market["symbol"]] = market["symbol"]
+
+    def _read_markets_cache(self, wanted):
+        if self.markets_cache_path is None or not os.path.exists(self.markets_cache_path):
+            return None
+        try:
+            with open(self.markets_cache_path, "r") as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if time.time() - cache["timestamp"] > self.markets_cache_ttl:
+            return None
+        markets = cache["markets"]
+        if wanted is None:
+            return markets, set()
+        markets = [market for market in markets if market["id"] in wanted or market["symbol"] in wanted]
+        missing = self._missing_ids(wanted, markets)
+        # Une paire absente au moment de l'écriture du cache le reste jusqu'à son expiration
+        if not missing.issubset(cache.get("missing", [])):
+            return None
+        return markets, missing
+
+    @staticmethod
+    def _missing_ids(wanted, markets):
+        if wanted is None:
+            return set()
+        return wanted - {market["id"] for market in markets} - {market["symbol"] for market in markets}
+
+    def _write_markets_cache(self, markets, missing=()):
+        if self.markets_cache_path is None:
+            return
+        os.makedirs(os.path.dirname(self.markets_cache_path) or ".", exist_ok=True)
+        tmp_path = self.markets_cache_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"timestamp": time.time(), "markets": markets, "missing": sorted(missing)}, f)
+        os.replace(tmp_path, self.markets_cache_path)
+
+    def invalidate_markets_cache(self):
         self.market = None
+        self._market_index = {}
+        self._missing_markets = set()
+        if self.markets_cache_path is not None and os.path.exists(self.markets_cache_path):
+            os.remove(self.markets_cache_path)
+
+    def _read_leverage_cache(self):
+        # {pair: [margin_mode, leverage, time applied or seen]}
+        if self.leverage_cache_path is None or not os.path.exists(self.leverage_cache_path):
+            return {}
+        try:
+            with open(self.leverage_cache_path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_leverage_cache(self):
+        if self.leverage_cache_path is None:
+            return
+        os.makedirs(os.path.dirname(self.leverage_cache_path) or ".", exist_ok=True)
+        tmp_path = self.leverage_cache_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self._leverage_state, f)
+        os.replace(tmp_path, self.leverage_cache_path)
+
+    def _remember_leverage(self, pair, margin_mode, leverage):
+        self._leverage_state[self.normalize_pair(pair)] = [margin_mode, float(leverage), time.time()]
 
-    async def load_markets(self):
-        if not self.market:
-            self.market = await self._session.load_markets()
+    def leverage_is_set(self, pair, margin_mode, leverage):
+        state = self._leverage_state.get(self.normalize_pair(pair))
+        if state is None or time.time() - state[2] > self.leverage_cache_ttl:
+            return False
+        return state[0] == margin_mode and state[1] == float(leverage)
 
     async def close(self):
         await self._session.close()
 
     def get_pair_info(self, pair):
         pair = self.normalize_pair(pair)
-        return self.market.get(pair)
+        return self.market.get(self._market_index.get(pair))
 
     def normalize_pair(self, pair):
         if self.exchange_name == "bybit":
@@ -76,48 +324,90 @@ class PerpExchange:
             return pair.replace("USDT", "/USDT")
         return pair.replace(":USDT", "")
 
+    def pair_from_symbol(self, symbol):
+        # Symbole unifié ccxt ("BTC/USDT:USDT") -> paire au format de la stratégie ("BTCUSDT" sur Bybit)
+        pair = symbol.split(":")[0]
+        if self.exchange_name == "bybit":
+            return pair.replace("/", "")
+        return pair
+
+    @instrumented
     async def get_last_ohlcv(self, pair, timeframe, limit=1000):
-        await self.load_markets()
         pair = self.normalize_pair(pair)
-        ts_dict = {
-            "1m": 1 * 60 * 1000,
-            "5m": 5 * 60 * 1000,
-            "15m": 15 * 60 * 1000,
-            "1h": 60 * 60 * 1000,
-            "2h": 2 * 60 * 60 * 1000,
-            "4h": 4 * 60 * 60 * 1000,
-            "1d": 24 * 60 * 60 * 1000,
-        }
+        buffer = None if self.kline_stream is None else self.kline_stream.buffers.get((pair, timeframe))
+        if buffer is not None and len(buffer) >= limit:
+            # Bougies tenues à jour par le websocket : aucune requête REST
+            self.metrics.increment("exchange.ohlcv_from_stream")
+            return buffer.frame(limit)
+        return await self._rest_ohlcv(pair, timeframe, limit)
+
+    async def _rest_ohlcv(self, pair, timeframe, limit):
+        await self.load_markets([pair])
+        pair = self.normalize_pair(pair)
+        tf_ms = TIMEFRAME_MS[timeframe]
         end_ts = int(datetime.datetime.now().timestamp() * 1000)
-        start_ts = end_ts - (limit * ts_dict[timeframe])
+        start_ts = end_ts - (limit * tf_ms)
+        if self.ohlcv_store is None:
+            return await self._fetch_ohlcv_range(pair, timeframe, start_ts, end_ts)
+
+        stored = self.ohlcv_store.load(self.exchange_name, pair, timeframe)
+        ranges = self.ohlcv_store.missing_ranges(stored, tf_ms, start_ts, end_ts)
+        fetched = await asyncio.gather(*[
+            self._fetch_ohlcv_range(pair, timeframe, range_start, range_end)
+            for range_start, range_end in ranges
+        ])
+        df = self.ohlcv_store.merge([stored] + fetched)
+        self.ohlcv_store.save(self.exchange_name, pair, timeframe, df)
+        return df[df.index >= pd.to_datetime(start_ts - start_ts % tf_ms, unit="ms")]
+
+    async def stream_klines(self, subscriptions, on_close, url=None, settle=2.0, reconnect=True):
+        """Keep {(pair, timeframe): candles} up to date from the Bybit kline websocket and await
+        on_close(close_ts, keys) at each confirmed candle close, until cancelled (see KlineStream).
+
+        While it runs, get_last_ohlcv() answers from the stream buffers without REST requests.
+        """
+        if self.exchange_name != "bybit":
+            raise ValueError(f"Kline streaming is not implemented for {self.exchange_name}")
+        # aiohttp et le client websocket ne sont chargés qu'en mode streaming
+        from utilities.kline_stream import BYBIT_KLINE_URL, KlineStream
+        await self.load_markets([pair for pair, _ in subscriptions])
+        subscriptions = {
+            (self.normalize_pair(pair), timeframe): limit
+            for (pair, timeframe), limit in subscriptions.items()
+            if self.get_pair_info(pair) is not None
+        }
+        self.kline_stream = KlineStream(url or BYBIT_KLINE_URL, subscriptions, self._rest_ohlcv, on_close, settle, reconnect, metrics=self.metrics)
+        try:
+            await self.kline_stream.run()
+        finally:
+            self.kline_stream = None
+
+    async def _fetch_ohlcv_range(self, pair, timeframe, start_ts, end_ts):
+        tf_ms = TIMEFRAME_MS[timeframe]
         current_ts = start_ts
         tasks = []
         bitmart_limit = 500
-        while current_ts < end_ts:
-            req_end_ts = min(current_ts + (bitmart_limit * ts_dict[timeframe]), end_ts)
+        while current_ts <= end_ts:
+            req_end_ts = min(current_ts + ((bitmart_limit - 1) * tf_ms), end_ts)
             tasks.append(
-                self._session.fetch_ohlcv(
+                self.scheduler.run(
+                    "market",
+                    self._session.fetch_ohlcv,
                     pair,
                     timeframe,
-                    params={
-                        "start_time": str(int(current_ts / 1000)),
-                        "end_time": str(int(req_end_ts / 1000)),
-                    },
+                    since=current_ts,
+                    limit=bitmart_limit,
+                    params={"until": req_end_ts},
                 )
             )
-            current_ts += (bitmart_limit * ts_dict[timeframe]) + 1
-        ohlcv_unpack = await asyncio.gather(*tasks)
-        ohlcv_list = [item for sublist in ohlcv_unpack for item in sublist]
-        df = pd.DataFrame(ohlcv_list, columns=["date", "open", "high", "low", "close", "volume"])
-        df.set_index("date", inplace=True)
-        df.index = pd.to_datetime(df.index, unit="ms")
-        df.sort_index(inplace=True)
-        return df
+            current_ts += bitmart_limit * tf_ms
+        return ohlcv_frame(await asyncio.gather(*tasks))
 
+    @instrumented
     async def get_balance(self):
         if platform.system() == "Emscripten":
             return UsdtBalance(total=10000.0, free=10000.0, used=0.0)
-        resp = await self._session.fetch_balance(params={"defaultType": "swap"})
+        resp = await self.scheduler.run("account", self._session.fetch_balance, params={"defaultType": "swap"})
         if self.exchange_name == "bybit":
             usdt_data = resp["info"]["result"]["list"][0]
             return UsdtBalance(
@@ -127,85 +417,181 @@ class PerpExchange:
             )
         return UsdtBalance(total=0.0, free=0.0, used=0.0)
 
+    @instrumented
     async def set_margin_mode_and_leverage(self, pair, margin_mode, leverage):
         if margin_mode not in ["cross", "isolated"]:
             raise Exception("Margin mode must be either 'cross' or 'isolated'")
         pair = self.normalize_pair(pair)
         try:
-            await self._session.set_margin_mode(margin_mode, pair)
-            await self._session.set_leverage(leverage, pair, params={"positionIdx": 0})
-            return Info(success=True, message=f"Margin mode and leverage set to {margin_mode} and {leverage}x")
+            await self.scheduler.run("account", self._session.set_margin_mode, margin_mode, pair)
         except Exception as e:
-            raise e
+            # Bybit refuse de "changer" vers l'état déjà en place
+            if "not modified" not in str(e):
+                raise e
+        try:
+            await self.scheduler.run("account", self._session.set_leverage, leverage, pair, params={"positionIdx": 0})
+        except Exception as e:
+            if "not modified" not in str(e):
+                raise e
+        self._remember_leverage(pair, margin_mode, leverage)
+        return Info(success=True, message=f"Margin mode and leverage set to {margin_mode} and {leverage}x")
+
+    @instrumented
+    async def ensure_margin_mode_and_leverage(self, pairs, margin_mode, leverage, max_concurrency=10):
+        """Call set_margin_mode_and_leverage() only for the pairs whose known state differs.
 
+        The state of each pair is remembered when it is set or seen in get_open_positions(), persisted
+        to `leverage_cache_path` and trusted for `leverage_cache_ttl` seconds. Returns {pair: Info or
+        exception} for the pairs that needed a change.
+        """
+        pending = [pair for pair in pairs if not self.leverage_is_set(pair, margin_mode, leverage)]
+        self.metrics.increment("exchange.leverage_skipped", len(pairs) - len(pending))
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def apply(pair):
+            async with semaphore:
+                return await self.set_margin_mode_and_leverage(pair, margin_mode, leverage)
+
+        results = await asyncio.gather(*[apply(pair) for pair in pending], return_exceptions=True)
+        if pending:
+            self._write_leverage_cache()
+        return dict(zip(pending, results))
+
+    @instrumented
     async def get_open_positions(self, pairs):
         if platform.system() == "Emscripten":
             return []
         pairs = [self.normalize_pair(pair) for pair in pairs]
-        resp = await self._session.fetch_positions(symbols=pairs, params={"settleCoin": "USDT"})
+        resp = await self.scheduler.run("position", self._session.fetch_positions, symbols=pairs, params={"settleCoin": "USDT"})
         return_positions = []
         for position in resp:
+            if position.get("leverage") and position.get("marginMode"):
+                self._remember_leverage(self.pair_from_symbol(position["symbol"]), position["marginMode"], position["leverage"])
             if float(position["contracts"]) == 0:
                 continue
-            liquidation_price = float(position["liquidationPrice"]) if position["liquidationPrice"] else 0
-            take_profit_price = float(position["takeProfitPrice"]) if position["takeProfitPrice"] else 0
-            stop_loss_price = float(position["stopLossPrice"]) if position["stopLossPrice"] else 0
+            liquidation_price = float(position["liquidationPrice"]) if position["liquidationPrice"] else 0.0
+            take_profit_price = float(position["takeProfitPrice"]) if position["takeProfitPrice"] else 0.0
+            stop_loss_price = float(position["stopLossPrice"]) if position["stopLossPrice"] else 0.0
             hedge_mode = bool(position["hedged"]) if "hedged" in position else False
-            return_positions.append(
-                Position(
-                    pair=self.denormalize_pair(position["symbol"]),
-                    side=position["side"],
-                    size=Decimal(position["contracts"]) * Decimal(position["contractSize"]),
-                    usd_size=round(float(position["notional"]), 2),
-                    entry_price=float(position["entryPrice"]),
-                    current_price=float(position["markPrice"]),
-                    unrealizedPnl=float(position["unrealizedPnl"]),
-                    liquidation_price=liquidation_price,
-                    leverage=float(position["leverage"]),
-                    margin_mode=position["info"].get("marginMode", "isolated"),
-                    hedge_mode=hedge_mode,
-                    open_timestamp=int(position["info"].get("updatedTime", 0)),
-                    take_profit_price=take_profit_price,
-                    stop_loss_price=stop_loss_price,
-                )
-            )
+            return_positions.append(PositionRecord(
+                self.pair_from_symbol(position["symbol"]),
+                position["side"],
+                contracts_to_size(position["contracts"], position["contractSize"]),
+                round(float(position["notional"]), 2),
+                float(position["entryPrice"]),
+                float(position["markPrice"]),
+                float(position["unrealizedPnl"]),
+                liquidation_price,
+                position["info"].get("marginMode", "isolated"),
+                float(position["leverage"]),
+                hedge_mode,
+                int(position["info"].get("updatedTime", 0)),
+                take_profit_price,
+                stop_loss_price,
+            ))
         return return_positions
 
-    async def place_order(self, pair, side, price, size, type="market", reduce=False, margin_mode="cross", leverage=1, error=True):
+    @instrumented
+    async def place_order(self, pair, side, price, size, type="market", reduce=False, margin_mode="cross", leverage=1, error=True, fetch_order=True):
         try:
+            start = time.perf_counter()
             pair = self.normalize_pair(pair)
             size = Decimal(self._session.amount_to_precision(pair, size))
             params = {"reduceOnly": reduce, "positionIdx": 0}
             if type == "limit":
                 params["price"] = self._session.price_to_precision(pair, price)
-            resp = await self._session.create_order(
+            resp = await self.scheduler.run(
+                "order",
+                self._session.create_order,
                 symbol=pair,
                 type=type,
                 side=side,
                 amount=size,
                 params=params
             )
-            order = await self.get_order_by_id(resp["id"], pair)
+            if fetch_order:
+                order = await self.get_order_by_id(resp["id"], pair)
+            else:
+                order = self._order_from_response(resp, pair, type, side, size, reduce)
+            order.latency_ms = (time.perf_counter() - start) * 1000
             return order
         except Exception as e:
             if error:
                 raise e
             return None
 
+    def _order_from_response(self, resp, pair, type, side, size, reduce):
+        # Bybit only acknowledges the order id on creation, missing fields come from the request
+        contract_size = float(self.get_pair_info(pair)["contractSize"])
+        amount = resp["amount"] if resp.get("amount") is not None else size
+        filled = resp["filled"] if resp.get("filled") is not None else 0
+        remaining = resp["remaining"] if resp.get("remaining") is not None else Decimal(amount) - Decimal(filled)
+        return Order.model_construct(
+            id=str(resp["id"]),
+            pair=self.denormalize_pair(pair),
+            type=resp.get("type") or type,
+            side=resp.get("side") or side,
+            price=float(resp["price"]) if resp.get("price") else 0.0,
+            size=contracts_to_size(amount, contract_size),
+            reduce=bool(resp["reduceOnly"]) if resp.get("reduceOnly") is not None else reduce,
+            filled=contracts_to_size(filled, contract_size),
+            remaining=contracts_to_size(remaining, contract_size),
+            timestamp=int(resp.get("timestamp") or time.time() * 1000),
+        )
+
+    @instrumented
+    async def place_orders(self, orders, max_concurrency=10):
+        """Submit a batch of place_order() requests given as keyword dicts.
+
+        Reduce-only orders are all sent concurrently first, then the other orders, without the
+        fetch_order round-trip (see resolve_orders). Returns, in request order, the Order or the
+        exception raised for each request.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def submit(order):
+            async with semaphore:
+                return await self.place_order(**{**order, "error": True, "fetch_order": False})
+
+        results = [None] * len(orders)
+        for reduce in (True, False):
+            indexes = [i for i, order in enumerate(orders) if bool(order.get("reduce", False)) == reduce]
+            responses = await asyncio.gather(*[submit(orders[i]) for i in indexes], return_exceptions=True)
+            for i, response in zip(indexes, responses):
+                results[i] = response
+        return results
+
+    @instrumented
+    async def resolve_orders(self, orders, max_concurrency=10):
+        """Fetch the fill state of placed orders, keeping the local Order when the fetch fails."""
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def resolve(order):
+            async with semaphore:
+                try:
+                    resolved = await self.get_order_by_id(order.id, order.pair)
+                except Exception:
+                    return order
+                resolved.latency_ms = order.latency_ms
+                return resolved
+
+        return await asyncio.gather(*[resolve(order) for order in orders])
+
+    @instrumented
     async def get_order_by_id(self, order_id, pair):
         pair = self.normalize_pair(pair)
-        resp = await self._session.fetch_order(order_id, pair)
+        resp = await self.scheduler.run("order", self._session.fetch_order, order_id, pair)
         contract_size = float(self.get_pair_info(self.denormalize_pair(pair))["contractSize"])
         reduce = bool(resp["reduceOnly"])
-        return Order(
-            id=resp["id"],
-            pair=self.denormalize_pair(resp["symbol"]),
+        return Order.model_construct(
+            id=str(resp["id"]),
+            pair=self.denormalize_pair(self.pair_from_symbol(resp["symbol"])),
             type=resp["type"],
             side=resp["side"],
             price=float(resp["price"]) if resp["price"] else 0.0,
-            size=Decimal(resp["amount"]) * Decimal(contract_size),
+            size=contracts_to_size(resp["amount"], contract_size),
             reduce=reduce,
-            filled=Decimal(resp["filled"]) * Decimal(contract_size),
-            remaining=Decimal(resp["remaining"]) * Decimal(contract_size),
-            timestamp=resp["timestamp"]
+            filled=contracts_to_size(resp["filled"], contract_size),
+            remaining=contracts_to_size(resp["remaining"], contract_size),
+            timestamp=int(resp["timestamp"]),
         )
\ No newline at end of file
@@ -0,0 +1,124 @@
+import json
+import os
+
+class PositionStore:
+    """Strategy positions ({key: {"side", "size", "open_price", "open_time"}}) kept crash-safe.
+
+    `snapshot_path` holds a full JSON snapshot (same format as the former positions_<account>.json)
+    and `snapshot_path + ".journal"` an append-only log of every open/update/close, written and
+    flushed as soon as it happens. Loading replays the journal on top of the snapshot; compact()
+    atomically rewrites the snapshot and empties the journal once it holds `compact_every` entries,
+    so a run costs O(changes) writes. Replaying an entry twice is harmless, hence a crash between
+    the snapshot replace and the journal truncation loses nothing.
+    """
+
+    def __init__(self, snapshot_path, compact_every=1000, fsync=True):
+        self.snapshot_path = snapshot_path
+        self.journal_path = snapshot_path + ".journal"
+        self.compact_every = compact_every
+        self.fsync = fsync
+        self.positions = {}
+        self.journal_entries = 0
+        self._journal = None
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.snapshot_path, "r") as f:
+                self.positions = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.positions = {}
+        self.journal_entries = 0
+        if not os.path.exists(self.journal_path):
+            return
+        with open(self.journal_path, "rb+") as f:
+            data = f.read()
+            end = data.rfind(b"\n") + 1
+            if end < len(data):
+                # Dernière ligne tronquée par un arrêt brutal : on la retire avant d'y ajouter la suite
+                f.truncate(end)
+        for line in data[:end].splitlines():
+            self._apply(json.loads(line))
+            self.journal_entries += 1
+
+    def _apply(self, entry):
+        if entry["op"] == "open":
+            self.positions[entry["key"]] = entry["position"]
+        elif entry["op"] == "update":
+            if entry["key"] in self.positions:
+                self.positions[entry["key"]].update(entry["fields"])
+        elif entry["op"] == "close":
+            self.positions.pop(entry["key"], None)
+
+    def _append(self, entry):
+        self._apply(entry)
+        if self._journal is None:
+            self._journal = open(self.journal_path, "a")
+        self._journal.write(json.dumps(entry) + "\n")
+        self._journal.flush()
+        self.journal_entries += 1
+
+    def __contains__(self, key):
+        return key in self.positions
+
+    def __getitem__(self, key):
+        return self.positions[key]
+
+    def __len__(self):
+        return len(self.positions)
+
+    def keys(self):
+        return self.positions.keys()
+
+    def items(self):
+        return self.positions.items()
+
+    def open(self, key, position):
+        self._append({"op": "open", "key": key, "position": position})
+
+    def update(self, key, **fields):
+        self._append({"op": "update", "key": key, "fields": fields})
+
+    def close(self, key):
+        self._append({"op": "close", "key": key})
+
+    def sync(self):
+        """Make the journal durable (fsync) and compact it when it grew past `compact_every` entries."""
+        if self._journal is not None and self.fsync:
+            os.fsync(self._journal.fileno())
+        if self.journal_entries >= self.compact_every:
+            self.compact()
+
+    def compact(self):
+        tmp_path = self.snapshot_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.positions, f)
+            if self.fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        open(self.journal_path, "w").close()
+        self.journal_entries = 0
+
+    def close_journal(self):
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+    def reconcile(self, exchange_positions, key_pairs):
+        """Match the stored keys found in `key_pairs` ({key: pair}) against
+        PerpExchange.get_open_positions() in one pass.
+
+        Returns ({(pair, side): exchange size}, [keys whose pair/side has no exchange position]).
+        """
+        sizes = {}
+        for position in exchange_positions:
+            sizes[(position.pair, position.side)] = sizes.get((position.pair, position.side), 0) + position.size
+        orphans = [
+            key for key, position in self.positions.items()
+            if key in key_pairs and (key_pairs[key], position["side"]) not in sizes
+        ]
+        return sizes, orphans
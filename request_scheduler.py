@@ -0,0 +1,89 @@
+import asyncio
+import heapq
+import itertools
+import random
+import time
+
+# Groupes d'endpoints : (priorité, requêtes par seconde, rafale). Limites Bybit v5 par UID pour les
+# ordres et le compte, par IP (600 / 5 s) pour les données de marché.
+ENDPOINT_GROUPS = {
+    "order": (0, 10.0, 10),
+    "position": (1, 10.0, 10),
+    "account": (1, 10.0, 10),
+    "market": (2, 100.0, 20),
+}
+
+class TokenBucket:
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    async def acquire(self, cost=1.0):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        # Le jeton est réservé tout de suite (solde négatif), les suivants attendent derrière
+        self.tokens -= cost
+        if self.tokens < 0:
+            await asyncio.sleep(-self.tokens / self.rate)
+
+class RequestScheduler:
+    """Runs exchange calls by priority class with per-group token buckets.
+
+    run(group, function, *args) first takes a token from the group's bucket (see ENDPOINT_GROUPS),
+    then waits for one of `max_concurrency` slots, which are handed out lowest priority value first
+    (orders, then positions/balance, then market data), FIFO within a class. Calls failing with one
+    of `retry_on` are retried up to `max_retries` times with exponential backoff and jitter.
+    """
+
+    def __init__(self, groups=None, max_concurrency=10, retry_on=(), max_retries=4, backoff=0.5, metrics=None):
+        self.groups = dict(groups or ENDPOINT_GROUPS)
+        self.buckets = {name: TokenBucket(rate, burst) for name, (_, rate, burst) in self.groups.items()}
+        self.max_concurrency = max_concurrency
+        self.retry_on = tuple(retry_on)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.metrics = metrics
+        self._active = 0
+        self._waiting = []
+        self._sequence = itertools.count()
+
+    async def _acquire_slot(self, priority):
+        if self._active < self.max_concurrency and not self._waiting:
+            self._active += 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiting, (priority, next(self._sequence), future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            # Créneau déjà attribué juste avant l'annulation : on le rend
+            if future.done() and not future.cancelled():
+                self._release_slot()
+            raise
+
+    def _release_slot(self):
+        while self._waiting:
+            _, _, future = heapq.heappop(self._waiting)
+            if not future.done():
+                future.set_result(None)
+                return
+        self._active -= 1
+
+    async def run(self, group, function, *args, **kwargs):
+        priority = self.groups[group][0]
+        for attempt in range(self.max_retries + 1):
+            await self.buckets[group].acquire()
+            await self._acquire_slot(priority)
+            try:
+                return await function(*args, **kwargs)
+            except self.retry_on:
+                if attempt == self.max_retries:
+                    raise
+                if self.metrics is not None:
+                    self.metrics.increment("exchange.retries")
+            finally:
+                self._release_slot()
+            await asyncio.sleep(self.backoff * 2 ** attempt * (1 + random.random()))
@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+from utilities.ohlcv_store import OHLCV_COLUMNS, to_ms
+from utilities.perp_exchange import TIMEFRAME_MS
+
+def base_timeframes(pair_timeframes):
+    """Pick, for each pair of {pair: [timeframes]}, the finest timeframe that every other divides."""
+    bases = {}
+    for pair, timeframes in pair_timeframes.items():
+        base = min(timeframes, key=lambda tf: TIMEFRAME_MS[tf])
+        if any(TIMEFRAME_MS[tf] % TIMEFRAME_MS[base] for tf in timeframes):
+            raise ValueError(f"Timeframes {timeframes} of {pair} cannot all be derived from {base}")
+        bases[pair] = base
+    return bases
+
+def base_limit(limits, base_timeframe):
+    """Number of base candles needed to derive `limits[timeframe]` candles of every timeframe."""
+    # Une bougie de plus pour compenser un premier paquet incomplet
+    return max((limit + 1) * (TIMEFRAME_MS[tf] // TIMEFRAME_MS[base_timeframe]) for tf, limit in limits.items())
+
+def resample_ohlcv(df, timeframe, base_timeframe, last_open=True):
+    """Aggregate base candles into `timeframe` candles aligned on UTC boundaries.
+
+    A leading bucket that starts after its boundary (cut by the fetch limit) is dropped. The "closed"
+    column is False for the bucket holding the last base candle when `last_open` (get_last_ohlcv()
+    always returns the candle in progress last), so iloc[-2] remains the last closed candle.
+    """
+    tf_ms = TIMEFRAME_MS[timeframe]
+    base_ms = TIMEFRAME_MS[base_timeframe]
+    if tf_ms == base_ms:
+        closed = np.ones(len(df), dtype=bool)
+        if last_open and len(df) > 0:
+            closed[-1] = False
+        return df[OHLCV_COLUMNS].assign(closed=closed)
+    ts = to_ms(df.index)
+    bucket = ts - ts % tf_ms
+    starts = np.flatnonzero(np.diff(bucket, prepend=bucket[:1] - 1))
+    counts = np.diff(np.append(starts, len(ts)))
+    if len(starts) > 0 and ts[0] != bucket[0]:
+        starts = starts[1:]
+        counts = counts[1:]
+    if len(starts) == 0:
+        return pd.DataFrame(columns=OHLCV_COLUMNS + ["closed"], index=pd.DatetimeIndex([], name="date"))
+    first = starts[0]
+    values = {col: df[col].to_numpy(dtype="float64")[first:] for col in OHLCV_COLUMNS}
+    offsets = starts - first
+    closed = np.ones(len(starts), dtype=bool)
+    if last_open:
+        closed[-1] = False
+    resampled = pd.DataFrame({
+        "open": values["open"][offsets],
+        "high": np.maximum.reduceat(values["high"], offsets),
+        "low": np.minimum.reduceat(values["low"], offsets),
+        "close": values["close"][offsets + counts - 1],
+        "volume": np.add.reduceat(values["volume"], offsets),
+        "closed": closed,
+    }, index=pd.to_datetime(bucket[starts], unit="ms"))
+    resampled.index.name = "date"
+    return resampled
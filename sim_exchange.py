@@ -0,0 +1,291 @@
+import asyncio
+import datetime
+import random
+import time
+import zlib
+from decimal import Decimal
+import pandas as pd
+from utilities.perp_exchange import PerpExchange, Order, PositionRecord, UsdtBalance, Info, TIMEFRAME_MS, MARKETS_CACHE_TTL, LEVERAGE_CACHE_TTL, instrumented
+from utilities.synthetic_market import SyntheticMarket, chunk_frames
+
+def synthetic_ohlcv(timeframe, end_ts, limit, seed=0, start_price=3000.0, volatility=0.01, model="gbm"):
+    tf_ms = TIMEFRAME_MS[timeframe]
+    end_ts = end_ts - end_ts % tf_ms
+    market = SyntheticMarket(["pair"], timeframe, end_ts - (limit - 1) * tf_ms, model=model, seed=seed, start_price=start_price, volatility=volatility)
+    return market.frames(limit)["pair"]
+
+class SimExchange(PerpExchange):
+    """Local replay exchange with the PerpExchange interface.
+
+    Candles come from `candles` ({(pair, timeframe): DataFrame}, e.g. recorded with OhlcvStore or
+    from_market()) or are generated on first use with the SyntheticMarket `model`. The clock is `now` (ms, real time when None) and can be moved with
+    advance(). Every call waits `latency` (+ up to `latency_jitter`) seconds and at most `rate_limit`
+    requests per second are served, after going through `scheduler` (a RequestScheduler) if given; orders fill at the open of the current candle with `slippage`,
+    `fill_ratio` and a `reject_rate` chance of failing.
+    """
+
+    def __init__(
+        self,
+        candles=None,
+        balance=10000.0,
+        now=None,
+        latency=0.0,
+        latency_jitter=0.0,
+        rate_limit=None,
+        slippage=0.0,
+        fee=0.0006,
+        fill_ratio=1.0,
+        reject_rate=0.0,
+        history=5000,
+        seed=0,
+        model="gbm",
+        leverage_cache_path=None,
+        leverage_cache_ttl=LEVERAGE_CACHE_TTL,
+        scheduler=None,
+        metrics=None,
+    ):
+        self._init_state("bybit", None, None, MARKETS_CACHE_TTL, leverage_cache_path, leverage_cache_ttl, metrics)
+        # Aucune session ccxt : chaque méthode qui en utilise une est remplacée ici
+        self._session = None
+        self.scheduler = scheduler
+        self.candles = dict(candles or {})
+        self.now = now
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.rate_limit = rate_limit
+        self.slippage = slippage
+        self.fee = fee
+        self.fill_ratio = fill_ratio
+        self.reject_rate = reject_rate
+        self.history = history
+        self.seed = seed
+        self.model = model
+        self.balance = balance
+        self.positions = {}
+        self.leverages = {}
+        self.orders = {}
+        self.request_count = 0
+        self._random = random.Random(seed)
+        self._next_request_time = 0.0
+
+    @classmethod
+    def from_store(cls, store, exchange_name, pairs, timeframes, **kwargs):
+        candles = {}
+        for pair in pairs:
+            for timeframe in timeframes:
+                df = store.load(exchange_name, pair, timeframe)
+                if df is not None:
+                    candles[(pair, timeframe)] = df
+        return cls(candles=candles, **kwargs)
+
+    @classmethod
+    def from_market(cls, market, candles, ahead=500, **kwargs):
+        """Exchange replaying `candles` candles of every pair of a SyntheticMarket, generated in one
+        vectorized block; the clock starts `ahead` candles before the end so that it can advance."""
+        timestamps, block = market.chunk(candles)
+        frames = chunk_frames(market.pairs, timestamps, block)
+        kwargs.setdefault("now", int(timestamps[-ahead - 1]))
+        return cls(candles={(pair, market.timeframe): df for pair, df in frames.items()}, **kwargs)
+
+    def now_ms(self):
+        if self.now is not None:
+            return self.now
+        return int(datetime.datetime.now().timestamp() * 1000)
+
+    def advance(self, timeframe, candles=1):
+        self.now = self.now_ms() + candles * TIMEFRAME_MS[timeframe]
+
+    async def _request(self, group="market"):
+        if self.scheduler is None:
+            return await self._serve()
+        return await self.scheduler.run(group, self._serve)
+
+    async def _serve(self):
+        self.request_count += 1
+        self.metrics.increment("exchange.http_requests")
+        delay = self.latency + self._random.uniform(0, self.latency_jitter)
+        if self.rate_limit:
+            now = time.monotonic()
+            slot = max(now, self._next_request_time)
+            self._next_request_time = slot + 1 / self.rate_limit
+            delay += slot - now
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    @instrumented
+    async def load_markets(self, pairs=None):
+        if pairs is None:
+            pairs = [pair for pair, _ in self.candles.keys()]
+        pairs = [self.normalize_pair(pair) for pair in pairs]
+        if self.market and set(pairs).issubset(self._market_index):
+            return
+        await self._request()
+        self.market = self.market or {}
+        for pair in pairs:
+            symbol = self._symbol(pair)
+            self.market[symbol] = {"id": pair, "symbol": symbol, "contractSize": 1.0, "precision": {"amount": 0.001, "price": 0.01}}
+            self._market_index[pair] = symbol
+            self._market_index[symbol] = symbol
+
+    def _symbol(self, pair):
+        # Symbole unifié ccxt d'une paire normalisée, comme dans les réponses de Bybit
+        return self.denormalize_pair(pair) + ":USDT"
+
+    async def close(self):
+        pass
+
+    def _get_candles(self, pair, timeframe):
+        if (pair, timeframe) not in self.candles:
+            # Assez de bougies après `now` pour pouvoir avancer l'horloge
+            self.candles[(pair, timeframe)] = synthetic_ohlcv(
+                timeframe,
+                self.now_ms() + 500 * TIMEFRAME_MS[timeframe],
+                self.history + 500,
+                seed=self.seed + zlib.crc32(pair.encode()),
+                model=self.model,
+            )
+        return self.candles[(pair, timeframe)]
+
+    def _current_candle(self, pair):
+        timeframes = [timeframe for candle_pair, timeframe in self.candles.keys() if candle_pair == pair]
+        timeframe = min(timeframes, key=lambda tf: TIMEFRAME_MS[tf]) if timeframes else "1h"
+        df = self._get_candles(pair, timeframe)
+        return df[df.index <= pd.to_datetime(self.now_ms(), unit="ms")].iloc[-1]
+
+    def _price(self, pair):
+        return float(self._current_candle(pair)["open"])
+
+    async def _rest_ohlcv(self, pair, timeframe, limit):
+        await self._request()
+        pair = self.normalize_pair(pair)
+        df = self._get_candles(pair, timeframe)
+        df = df[df.index <= pd.to_datetime(self.now_ms(), unit="ms")].tail(limit).copy()
+        # La dernière bougie est encore ouverte : seul son prix d'ouverture est connu
+        df.iloc[-1, df.columns.get_indexer(["high", "low", "close"])] = df["open"].iloc[-1]
+        df.iloc[-1, df.columns.get_loc("volume")] = 0.0
+        return df
+
+    def _unrealized_pnl(self, pair, position):
+        direction = 1 if position["side"] == "long" else -1
+        return direction * (self._price(pair) - position["entry_price"]) * position["size"]
+
+    @instrumented
+    async def get_balance(self):
+        await self._request("account")
+        unrealized_pnl = sum(self._unrealized_pnl(pair, position) for pair, position in self.positions.items())
+        used = sum(
+            position["size"] * position["entry_price"] / self.leverages.get(pair, ("cross", 1))[1]
+            for pair, position in self.positions.items()
+        )
+        total = self.balance + unrealized_pnl
+        return UsdtBalance(total=total, free=total - used, used=used)
+
+    @instrumented
+    async def set_margin_mode_and_leverage(self, pair, margin_mode, leverage):
+        if margin_mode not in ["cross", "isolated"]:
+            raise Exception("Margin mode must be either 'cross' or 'isolated'")
+        await self._request("account")
+        await self._request("account")
+        self.leverages[self.normalize_pair(pair)] = (margin_mode, leverage)
+        self._remember_leverage(pair, margin_mode, leverage)
+        return Info(success=True, message=f"Margin mode and leverage set to {margin_mode} and {leverage}x")
+
+    @instrumented
+    async def get_open_positions(self, pairs):
+        await self._request("position")
+        pairs = [self.normalize_pair(pair) for pair in pairs]
+        return_positions = []
+        for pair, position in self.positions.items():
+            if pair not in pairs:
+                continue
+            current_price = self._price(pair)
+            margin_mode, leverage = self.leverages.get(pair, ("cross", 1))
+            self._remember_leverage(pair, margin_mode, leverage)
+            return_positions.append(
+                PositionRecord(
+                    pair=self.pair_from_symbol(self._symbol(pair)),
+                    side=position["side"],
+                    size=position["size"],
+                    usd_size=round(position["size"] * current_price, 2),
+                    entry_price=position["entry_price"],
+                    current_price=current_price,
+                    unrealizedPnl=self._unrealized_pnl(pair, position),
+                    liquidation_price=0.0,
+                    leverage=float(leverage),
+                    margin_mode=margin_mode,
+                    hedge_mode=False,
+                    open_timestamp=position["open_timestamp"],
+                    take_profit_price=0.0,
+                    stop_loss_price=0.0,
+                )
+            )
+        return return_positions
+
+    def _fill(self, pair, side, size, reduce, price):
+        position = self.positions.get(pair)
+        order_side = "long" if side == "buy" else "short"
+        if reduce:
+            if position is None or position["side"] == order_side:
+                raise Exception(f"Reduce-only order rejected: no {'short' if side == 'buy' else 'long'} position on {pair}")
+            size = min(size, position["size"])
+        self.balance -= size * price * self.fee
+        if position is None:
+            self.positions[pair] = {"side": order_side, "size": size, "entry_price": price, "open_timestamp": self.now_ms()}
+        elif position["side"] == order_side:
+            total_size = position["size"] + size
+            position["entry_price"] = (position["entry_price"] * position["size"] + price * size) / total_size
+            position["size"] = total_size
+        else:
+            closed_size = min(size, position["size"])
+            direction = 1 if position["side"] == "long" else -1
+            self.balance += direction * (price - position["entry_price"]) * closed_size
+            position["size"] -= closed_size
+            if position["size"] <= 1e-12:
+                del self.positions[pair]
+            if size > closed_size:
+                self.positions[pair] = {"side": order_side, "size": size - closed_size, "entry_price": price, "open_timestamp": self.now_ms()}
+        return size
+
+    @instrumented
+    async def place_order(self, pair, side, price, size, type="market", reduce=False, margin_mode="cross", leverage=1, error=True, fetch_order=True):
+        try:
+            start = time.perf_counter()
+            pair = self.normalize_pair(pair)
+            await self._request("order")
+            if self._random.random() < self.reject_rate:
+                raise Exception(f"Simulated rejection of {side} {size} {pair}")
+            size = round(float(size), 3)
+            market_price = self._price(pair)
+            fill_price = market_price * (1 + self.slippage if side == "buy" else 1 - self.slippage)
+            if type == "limit":
+                fill_price = price
+            filled = self._fill(pair, side, size * self.fill_ratio, reduce, fill_price)
+            order = Order(
+                id=str(len(self.orders) + 1),
+                pair=self.denormalize_pair(self.pair_from_symbol(self._symbol(pair))),
+                type=type,
+                side=side,
+                price=fill_price,
+                size=size,
+                reduce=reduce,
+                filled=filled,
+                remaining=size - filled,
+                timestamp=self.now_ms(),
+            )
+            self.orders[order.id] = order
+            if fetch_order:
+                order = await self.get_order_by_id(order.id, pair)
+            else:
+                # Comme Bybit, la réponse de création ne contient que l'identifiant
+                order = self._order_from_response({"id": order.id}, pair, type, side, Decimal(str(size)), reduce)
+            order.latency_ms = (time.perf_counter() - start) * 1000
+            return order
+        except Exception as e:
+            if error:
+                raise e
+            return None
+
+    @instrumented
+    async def get_order_by_id(self, order_id, pair):
+        await self._request("order")
+        return self.orders[order_id].model_copy()
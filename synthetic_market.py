@@ -0,0 +1,176 @@
+import argparse
+import os
+import time
+import numpy as np
+import pandas as pd
+from utilities.ohlcv_store import OHLCV_COLUMNS, OhlcvStore
+from utilities.perp_exchange import TIMEFRAME_MS
+
+MODELS = ("gbm", "regime", "jump")
+# (dérive, multiplicateur de volatilité) par régime, parcourus à tour de rôle
+DEFAULT_REGIMES = ((0.0002, 0.7), (-0.0003, 2.0))
+# Cellules (paires x bougies) générées par bloc : ~5 x 8 octets chacune
+CHUNK_CELLS = 2_000_000
+
+class SyntheticMarket:
+    """Vectorized candle generator for many pairs at once.
+
+    Log returns follow `model`: "gbm" (drift and volatility per candle), "regime" (drift/volatility
+    of `regimes`, moving to the next regime with `switch_probability` per candle) or "jump" (GBM plus
+    Poisson jumps of intensity `jump_intensity` and size N(`jump_mean`, `jump_size`)). Every candle
+    opens at the previous close, and its high/low wicks and volume scale with the candle's volatility,
+    so low <= min(open, close) <= max(open, close) <= high always holds.
+
+    `pairs` is a list of names or a count (PAIR0USDT, PAIR1USDT...). The market is a stream: chunk()
+    and chunks() continue from the last generated candle. The same seed, pairs and chunk sizes give
+    the same candles.
+    """
+
+    def __init__(
+        self,
+        pairs,
+        timeframe="1h",
+        start_ts=1_600_000_000_000,
+        model="gbm",
+        seed=0,
+        start_price=3000.0,
+        drift=0.0,
+        volatility=0.01,
+        regimes=DEFAULT_REGIMES,
+        switch_probability=0.01,
+        jump_intensity=0.01,
+        jump_mean=0.0,
+        jump_size=0.05,
+        volume=500.0,
+    ):
+        if model not in MODELS:
+            raise ValueError(f"Unknown model {model}, expected one of {MODELS}")
+        self.pairs = [f"PAIR{i}USDT" for i in range(pairs)] if isinstance(pairs, int) else list(pairs)
+        self.timeframe = timeframe
+        self.tf_ms = TIMEFRAME_MS[timeframe]
+        self.model = model
+        self.drift = drift
+        self.volatility = volatility
+        self.regimes = np.array(regimes, dtype="float64")
+        self.switch_probability = switch_probability
+        self.jump_intensity = jump_intensity
+        self.jump_mean = jump_mean
+        self.jump_size = jump_size
+        self.volume = volume
+        self._rng = np.random.default_rng(seed)
+        self._close = np.broadcast_to(np.asarray(start_price, dtype="float64"), (len(self.pairs),)).copy()
+        self._regime = self._rng.integers(0, len(self.regimes), len(self.pairs))
+        self._next_ts = start_ts - start_ts % self.tf_ms
+
+    def _returns(self, size):
+        # Log-rendements (paires, bougies) et volatilité de chaque bougie
+        shape = (len(self.pairs), size)
+        noise = self._rng.standard_normal(shape)
+        if self.model == "regime":
+            switches = np.cumsum(self._rng.random(shape) < self.switch_probability, axis=1)
+            regime = (self._regime[:, None] + switches) % len(self.regimes)
+            self._regime = regime[:, -1]
+            drift = self.regimes[regime, 0]
+            sigma = self.volatility * self.regimes[regime, 1]
+            return drift - sigma ** 2 / 2 + sigma * noise, sigma
+        sigma = np.full(shape, self.volatility)
+        returns = self.drift - self.volatility ** 2 / 2 + self.volatility * noise
+        if self.model == "jump":
+            # Somme de k sauts gaussiens : N(k * moyenne, k * variance)
+            jumps = self._rng.poisson(self.jump_intensity, shape)
+            returns += jumps * self.jump_mean + np.sqrt(jumps) * self.jump_size * self._rng.standard_normal(shape)
+        return returns, sigma
+
+    def chunk(self, size):
+        """Next `size` candles of every pair.
+
+        Returns the open timestamps (ms, shape (size,)) and a (5, pairs, size) float64 block in
+        OHLCV_COLUMNS order.
+        """
+        returns, sigma = self._returns(size)
+        block = np.empty((5, len(self.pairs), size))
+        open, high, low, close, volume = block
+        np.cumsum(returns, axis=1, out=close)
+        np.exp(close, out=close)
+        close *= self._close[:, None]
+        open[:, 0] = self._close
+        open[:, 1:] = close[:, :-1]
+        wicks = np.abs(self._rng.standard_normal((2, len(self.pairs), size))) * (sigma / 2)
+        np.maximum(open, close, out=high)
+        high *= np.exp(wicks[0])
+        np.minimum(open, close, out=low)
+        low *= np.exp(-wicks[1])
+        # Plus de volume sur les grandes bougies
+        volume[:] = self.volume * np.exp(0.5 * self._rng.standard_normal(returns.shape)) * (1 + np.abs(returns) / sigma)
+        self._close = close[:, -1].copy()
+        timestamps = self._next_ts + np.arange(size, dtype="int64") * self.tf_ms
+        self._next_ts += size * self.tf_ms
+        return timestamps, block
+
+    def chunks(self, candles, chunk_size=None):
+        """Yield (timestamps, block) chunks until `candles` candles per pair were generated.
+
+        `chunk_size` defaults to about CHUNK_CELLS cells per block (~80 MB).
+        """
+        chunk_size = chunk_size or max(1, CHUNK_CELLS // len(self.pairs))
+        for start in range(0, candles, chunk_size):
+            yield self.chunk(min(chunk_size, candles - start))
+
+    def frames(self, candles):
+        """{pair: DataFrame} of the next `candles` candles, in the get_last_ohlcv() format."""
+        timestamps, block = self.chunk(candles)
+        return chunk_frames(self.pairs, timestamps, block)
+
+    def to_store(self, store, exchange_name, candles, chunk_size=None):
+        """Stream `candles` candles per pair into an OhlcvStore.
+
+        Chunks are written to a memory-mapped (pairs, 5, candles) .npy file next to the store, then
+        each pair is saved from its contiguous slice, so memory stays bounded by one chunk and one pair.
+        """
+        os.makedirs(store.root_dir, exist_ok=True)
+        path = os.path.join(store.root_dir, f".synthetic_{os.getpid()}.npy")
+        data = np.lib.format.open_memmap(path, mode="w+", dtype="float64", shape=(len(self.pairs), 5, candles))
+        try:
+            timestamps = []
+            offset = 0
+            for chunk_timestamps, block in self.chunks(candles, chunk_size):
+                data[:, :, offset:offset + len(chunk_timestamps)] = block.transpose(1, 0, 2)
+                timestamps.append(chunk_timestamps)
+                offset += len(chunk_timestamps)
+            index = pd.to_datetime(np.concatenate(timestamps), unit="ms")
+            for i, pair in enumerate(self.pairs):
+                df = pd.DataFrame(data[i].T, index=index, columns=OHLCV_COLUMNS)
+                store.save(exchange_name, pair, self.timeframe, df)
+        finally:
+            del data
+            os.remove(path)
+
+def chunk_frames(pairs, timestamps, block):
+    """{pair: DataFrame} views of a (5, pairs, candles) block, without copying the columns."""
+    index = pd.to_datetime(timestamps, unit="ms")
+    index.name = "date"
+    return {
+        pair: pd.DataFrame(block[:, i].T, index=index, columns=OHLCV_COLUMNS, copy=False)
+        for i, pair in enumerate(pairs)
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate synthetic candles for load tests")
+    parser.add_argument("--pairs", type=int, default=1000)
+    parser.add_argument("--candles", type=int, default=100_000)
+    parser.add_argument("--timeframe", default="1m")
+    parser.add_argument("--model", default="gbm", choices=MODELS)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunk-size", type=int)
+    parser.add_argument("--store", help="OhlcvStore directory to write the candles to (only timed otherwise)")
+    args = parser.parse_args()
+
+    market = SyntheticMarket(args.pairs, args.timeframe, model=args.model, seed=args.seed)
+    start = time.perf_counter()
+    if args.store:
+        market.to_store(OhlcvStore(args.store), "bybit", args.candles, args.chunk_size)
+    else:
+        for _ in market.chunks(args.candles, args.chunk_size):
+            pass
+    elapsed = time.perf_counter() - start
+    print(f"{args.pairs} pairs x {args.candles} candles ({args.model}) in {elapsed:.2f} s, {args.pairs * args.candles / elapsed:,.0f} candles/s")
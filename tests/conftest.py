@@ -0,0 +1,13 @@
+import importlib.machinery
+import importlib.util
+import os
+import sys
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Le dépôt est déployé comme Live-Tools-V2/utilities : les modules s'importent sous ce nom
+if importlib.util.find_spec("utilities") is None:
+    spec = importlib.machinery.ModuleSpec("utilities", None, is_package=True)
+    spec.submodule_search_locations = [REPO]
+    sys.modules["utilities"] = importlib.util.module_from_spec(spec)
+sys.path.insert(0, REPO)
@@ -0,0 +1,27 @@
+import numpy as np
+import pandas as pd
+import pytest
+from utilities.custom_indicators import LagMatrix, get_n_columns
+
+def make_df(rows=50):
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({"close": rng.random(rows), "volume": rng.random(rows)})
+
+def test_lag_matrix_matches_get_n_columns():
+    df = make_df()
+    lags = LagMatrix(df, ["close", "volume"], 5)
+    frame = lags.frame()
+    for n in range(1, 6):
+        expected = get_n_columns(df, ["close", "volume"], n)
+        columns = [f"n{n}_close", f"n{n}_volume"]
+        pd.testing.assert_frame_equal(frame[columns], expected[columns])
+        np.testing.assert_array_equal(lags.lag("close", n), expected[f"n{n}_close"].to_numpy())
+    np.testing.assert_array_equal(lags.view([4, 2, 0])[:, 0], lags.view()[:, 0, [4, 2, 0]])
+
+@pytest.mark.parametrize("lags", [[-1], [-1, 1], [0, 6], [6]])
+def test_lag_matrix_rejects_out_of_range_lags(lags):
+    lags_matrix = LagMatrix(make_df(), ["close"], 5)
+    with pytest.raises(ValueError):
+        lags_matrix.view(lags)
+    with pytest.raises(ValueError):
+        lags_matrix.lag("close", next(lag for lag in lags if not 0 <= lag <= 5))
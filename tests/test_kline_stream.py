@@ -0,0 +1,103 @@
+import asyncio
+import numpy as np
+import pandas as pd
+from utilities.kline_stream import CandleBuffer, KlineReplayServer, KlineStream, kline_topic
+from utilities.ohlcv_store import OHLCV_COLUMNS, to_ms
+from utilities.perp_exchange import TIMEFRAME_MS
+from utilities.sim_exchange import synthetic_ohlcv
+
+HOUR = TIMEFRAME_MS["1h"]
+START = 1_700_000_000_000 - 1_700_000_000_000 % HOUR
+KEY = ("BTCUSDT", "1h")
+
+def make_candles(count):
+    return synthetic_ohlcv("1h", START + (count - 1) * HOUR, count, seed=1)
+
+def kline_message(df, i, confirm=True):
+    row = df.iloc[i]
+    kline = {col: str(row[col]) for col in OHLCV_COLUMNS}
+    return {"topic": kline_topic(*KEY), "data": [dict(kline, start=int(to_ms(df.index[i:i + 1])[0]), confirm=confirm)]}
+
+def assert_closed_candles(frame, df):
+    # Bougies fermées identiques à la source, puis la bougie en cours ouverte au dernier close
+    np.testing.assert_allclose(frame.iloc[:-1].to_numpy(), df.loc[frame.index[:-1], OHLCV_COLUMNS].to_numpy())
+    close = df.loc[frame.index[-2], "close"]
+    assert frame.iloc[-1].tolist() == [close, close, close, close, 0.0]
+    assert frame.index[-1] - frame.index[-2] == pd.Timedelta(hours=1)
+
+def test_candle_buffer_compaction_keeps_last_candles():
+    df = make_candles(40)
+    buffer = CandleBuffer("1h", 5)
+    buffer.load(df.iloc[:3])
+    ts = to_ms(df.index)
+    values = df[OHLCV_COLUMNS].to_numpy()
+    # 38 clôtures : la mémoire de 2 x 5 bougies est compactée plusieurs fois
+    for i in range(2, 40):
+        assert buffer.update(int(ts[i]), values[i], True)
+    frame = buffer.frame()
+    assert len(buffer) == 5
+    assert list(frame.index[:-1]) == list(df.index[36:])
+    assert_closed_candles(frame, df)
+
+def test_candle_buffer_refuses_missing_candles():
+    df = make_candles(10)
+    buffer = CandleBuffer("1h", 5)
+    buffer.load(df.iloc[:5])
+    before = buffer.frame()
+    ts = to_ms(df.index)
+    assert not buffer.update(int(ts[6]), df[OHLCV_COLUMNS].to_numpy()[6], True)
+    # Une mise à jour plus ancienne que la bougie en cours est ignorée
+    assert buffer.update(int(ts[2]), df[OHLCV_COLUMNS].to_numpy()[2], True)
+    pd.testing.assert_frame_equal(buffer.frame(), before)
+
+def test_kline_stream_reloads_after_missed_candles():
+    df = make_candles(20)
+    seeds = []
+
+    async def seed(pair, timeframe, limit):
+        seeds.append((pair, timeframe, limit))
+        return df.iloc[:16].tail(limit)
+
+    async def handle():
+        stream = KlineStream("ws://unused", {KEY: 10}, seed, on_close=None)
+        stream._closes = asyncio.Queue()
+        stream.buffers[KEY].load(df.iloc[:10])
+        await stream._handle(kline_message(df, 15))
+        return stream, stream._closes.get_nowait()
+
+    stream, (close_ts, keys) = asyncio.run(handle())
+    assert seeds == [("BTCUSDT", "1h", 10)]
+    frame = stream.buffers[KEY].frame()
+    assert frame.index[-2] == df.index[15]
+    assert_closed_candles(frame, df)
+    assert (close_ts, keys) == (int(to_ms(df.index[15:16])[0]) + HOUR, {KEY})
+
+def test_kline_stream_replay_matches_source_candles():
+    df = make_candles(40)
+    start = 20
+    closes = []
+
+    async def seed(pair, timeframe, limit):
+        # Historique REST au démarrage : la bougie `start` est en cours
+        return df.iloc[:start + 1].tail(limit)
+
+    async def replay():
+        server = KlineReplayServer({KEY: df}, int(to_ms(df.index[start:start + 1])[0]), interval=0.01)
+        url = await server.start()
+        stream = None
+
+        async def on_close(close_ts, keys):
+            closes.append(close_ts)
+            assert keys == {KEY}
+            frame = stream.buffers[KEY].frame()
+            assert frame.index[-1] == pd.to_datetime(close_ts, unit="ms")
+            assert_closed_candles(frame, df)
+
+        stream = KlineStream(url, {KEY: 10}, seed, on_close, settle=0.05, reconnect=False)
+        try:
+            await asyncio.wait_for(stream.run(), 30)
+        finally:
+            await server.stop()
+
+    asyncio.run(replay())
+    assert closes == [int(ts) + HOUR for ts in to_ms(df.index[start:])]
@@ -0,0 +1,98 @@
+import asyncio
+import json
+from utilities.perp_exchange import PerpExchange
+from utilities.position_store import PositionStore
+
+POSITION = {"side": "long", "size": 0.5, "open_price": 3000.0, "open_time": 1700000000000}
+
+def bybit_position(symbol, side, contracts):
+    # Position telle que renvoyée par ccxt bybit.fetch_positions
+    return {
+        "symbol": symbol, "side": side, "contracts": contracts, "contractSize": 1.0,
+        "notional": contracts * 3000.0, "entryPrice": 2990.0, "markPrice": 3000.0, "unrealizedPnl": 5.0,
+        "liquidationPrice": "1500.0", "takeProfitPrice": None, "stopLossPrice": None, "hedged": False,
+        "leverage": 2.0, "marginMode": "isolated",
+        "info": {"symbol": symbol.split(":")[0].replace("/", ""), "tradeMode": "1", "marginMode": "isolated", "updatedTime": "1700000000000"},
+    }
+
+class PositionSession:
+    def __init__(self, positions):
+        self.positions = positions
+
+    async def fetch_positions(self, symbols=None, params={}):
+        return self.positions
+
+    async def close(self):
+        pass
+
+def test_replay_after_torn_last_line(tmp_path):
+    path = str(tmp_path / "positions.json")
+    store = PositionStore(path, fsync=False)
+    store.open("p1", dict(POSITION))
+    store.open("p2", dict(POSITION, side="short"))
+    store.close_journal()
+    with open(path + ".journal", "a") as f:
+        f.write('{"op": "close", "key": "p1"')
+
+    store = PositionStore(path, fsync=False)
+    assert set(store.keys()) == {"p1", "p2"}
+    assert store.journal_entries == 2
+    store.update("p2", size=0.25)
+    store.close_journal()
+    assert PositionStore(path, fsync=False).positions == {"p1": POSITION, "p2": dict(POSITION, side="short", size=0.25)}
+
+def test_replay_after_crash_before_journal_truncation(tmp_path):
+    path = str(tmp_path / "positions.json")
+    store = PositionStore(path, fsync=False)
+    store.open("p1", dict(POSITION))
+    store.update("p1", size=1.0)
+    store.open("p2", dict(POSITION))
+    store.close("p2")
+    store.close_journal()
+    with open(path + ".journal") as f:
+        journal = f.read()
+    expected = dict(store.positions)
+
+    store.compact()
+    # Arrêt entre le remplacement du snapshot et la troncature du journal
+    with open(path + ".journal", "w") as f:
+        f.write(journal)
+    store = PositionStore(path, fsync=False)
+    assert store.positions == expected
+    store.compact()
+    assert PositionStore(path, fsync=False).positions == expected
+
+def test_sync_compacts_past_threshold(tmp_path):
+    path = str(tmp_path / "positions.json")
+    store = PositionStore(path, compact_every=3, fsync=False)
+    store.open("p1", dict(POSITION))
+    store.open("p2", dict(POSITION))
+    store.sync()
+    assert store.journal_entries == 2
+    store.close("p1")
+    store.sync()
+    assert store.journal_entries == 0
+    with open(path) as f:
+        assert json.load(f) == {"p2": POSITION}
+    with open(path + ".journal") as f:
+        assert f.read() == ""
+
+def test_reconcile_live_bybit_positions(tmp_path):
+    async def open_positions():
+        exchange = PerpExchange("bybit")
+        await exchange.close()
+        exchange._session = PositionSession([
+            bybit_position("BTC/USDT:USDT", "long", 0.5),
+            bybit_position("ETH/USDT:USDT", "short", 2.0),
+            bybit_position("SOL/USDT:USDT", "long", 0),
+        ])
+        return await exchange.get_open_positions(["BTCUSDT", "ETHUSDT", "SOLUSDT"])
+
+    positions = asyncio.run(open_positions())
+    store = PositionStore(str(tmp_path / "positions.json"), fsync=False)
+    store.open("btc", dict(POSITION))
+    store.open("eth", dict(POSITION, side="short"))
+    store.open("sol", dict(POSITION))
+    sizes, orphans = store.reconcile(positions, {"btc": "BTCUSDT", "eth": "ETHUSDT", "sol": "SOLUSDT"})
+    assert sizes == {("BTCUSDT", "long"): 0.5, ("ETHUSDT", "short"): 2.0}
+    assert orphans == ["sol"]
@@ -0,0 +1,65 @@
+import asyncio
+import pytest
+from utilities.request_scheduler import RequestScheduler
+
+# Débit illimité : seuls les créneaux de concurrence ordonnent les appels
+GROUPS = {"order": (0, 1e9, 1e9), "position": (1, 1e9, 1e9), "market": (2, 1e9, 1e9)}
+
+class Retry(Exception):
+    pass
+
+def test_waiting_calls_run_by_priority_then_fifo():
+    started = []
+
+    async def run():
+        scheduler = RequestScheduler(groups=GROUPS, max_concurrency=1)
+        gate = asyncio.Event()
+
+        async def call(name):
+            started.append(name)
+            if name == "blocker":
+                await gate.wait()
+
+        blocker = asyncio.ensure_future(scheduler.run("market", call, "blocker"))
+        await asyncio.sleep(0)
+        waiting = [
+            asyncio.ensure_future(scheduler.run(group, call, name))
+            for group, name in [("market", "m1"), ("position", "p1"), ("order", "o1"), ("market", "m2"), ("order", "o2")]
+        ]
+        await asyncio.sleep(0)
+        gate.set()
+        await asyncio.gather(blocker, *waiting)
+        return scheduler
+
+    scheduler = asyncio.run(run())
+    assert started == ["blocker", "o1", "o2", "p1", "m1", "m2"]
+    assert scheduler._active == 0
+
+def test_cancelled_waiter_does_not_leak_its_slot():
+    async def run():
+        scheduler = RequestScheduler(groups=GROUPS, max_concurrency=1)
+        gate = asyncio.Event()
+        blocker = asyncio.ensure_future(scheduler.run("market", gate.wait))
+        await asyncio.sleep(0)
+        cancelled = asyncio.ensure_future(scheduler.run("order", asyncio.sleep, 0))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        gate.set()
+        await blocker
+        assert await scheduler.run("order", asyncio.sleep, 0, "done") == "done"
+        return scheduler._active
+
+    assert asyncio.run(run()) == 0
+
+def test_retries_then_raises():
+    calls = []
+
+    async def failing():
+        calls.append(1)
+        raise Retry()
+
+    scheduler = RequestScheduler(groups=GROUPS, retry_on=(Retry,), max_retries=2, backoff=0.001)
+    with pytest.raises(Retry):
+        asyncio.run(scheduler.run("order", failing))
+    assert len(calls) == 3
+    assert scheduler._active == 0
@@ -0,0 +1,33 @@
+import asyncio
+from utilities.position_store import PositionStore
+from utilities.sim_exchange import SimExchange
+
+def test_sim_pairs_match_live_format(tmp_path):
+    async def trade():
+        exchange = SimExchange(now=1_700_000_000_000)
+        await exchange.load_markets(["BTCUSDT", "ETHUSDT"])
+        orders = [
+            await exchange.place_order("BTCUSDT", "buy", None, 0.5),
+            await exchange.place_order("BTC/USDT", "buy", None, 0.5, fetch_order=False),
+        ]
+        orders += await exchange.place_orders([{"pair": "ETHUSDT", "side": "sell", "price": None, "size": 1.0}])
+        orders += await exchange.resolve_orders(orders[-1:])
+        return exchange, orders, await exchange.get_open_positions(["BTCUSDT", "ETHUSDT"])
+
+    exchange, orders, positions = asyncio.run(trade())
+    # Mêmes formats que PerpExchange : paire de la stratégie pour les positions, "BTC/USDT" pour les ordres
+    assert [order.pair for order in orders] == ["BTC/USDT", "BTC/USDT", "ETH/USDT", "ETH/USDT"]
+    assert exchange.get_pair_info("BTCUSDT")["symbol"] == "BTC/USDT:USDT"
+    store = PositionStore(str(tmp_path / "positions.json"), fsync=False)
+    store.open("btc", {"side": "long", "size": 1.0, "open_price": 3000.0, "open_time": 0})
+    sizes, orphans = store.reconcile(positions, {"btc": "BTCUSDT"})
+    assert sizes == {("BTCUSDT", "long"): 1.0, ("ETHUSDT", "short"): 1.0}
+    assert orphans == []
+
+def test_sim_invalidate_markets_cache():
+    exchange = SimExchange()
+    asyncio.run(exchange.load_markets(["BTCUSDT"]))
+    exchange.invalidate_markets_cache()
+    assert exchange.market is None
+    asyncio.run(exchange.load_markets(["BTCUSDT"]))
+    assert exchange.get_pair_info("BTCUSDT")["id"] == "BTCUSDT"
@@ -1,21 +1,30 @@
+import argparse
 import asyncio
 import datetime
-import pandas as pd
-import numpy as np
-import ta
+import time
 import math
 import copy
 import json
 import platform
 import os
-from utilities.perp_exchange import PerpExchange
-from utilities.custom_indicators import Trix
+import zlib
+from utilities.perp_exchange import PerpExchange, TIMEFRAME_MS, exposure_summary
+from utilities.custom_indicators import trix_batch, ema_batch
+from utilities.ohlcv_store import OhlcvStore
+from utilities.request_scheduler import RequestScheduler
+from utilities.metrics import summarize
+from utilities.async_logger import AsyncLogger
+from utilities.position_store import PositionStore
+from utilities.resample import base_timeframes, base_limit, resample_ohlcv
+from utilities.lookback import plan_lookback
 
 # Configuration
 MARGIN_MODE = "isolated"  # isolated or cross
 LEVERAGE = 1.5
 ACCOUNT_NAME = "bybit1"
+SIMULATION_ACCOUNT_NAME = "simulation"
 SIDE = ["long"]
+LOOKBACK_TOLERANCE = 1e-4  # poids du seed tronqué dans chaque EMA (relatif au prix) ; trix_pct/histogramme : ~100 x en points de %, en absolu, sans borne relative
 PARAMS = {
     "2h": {
         "p1": {
@@ -28,7 +37,8 @@ PARAMS = {
             "ETHUSDT": {
                 "trix_length": 21,
                 "trix_signal_length": 47,
-                "trix_signal_type": "s,attrsma",
+                # "s,attrsma" à l'origine : "sma" une fois retiré le texte parasite ",attr"
+                "trix_signal_type": "sma",
                 "long_ma_length": 300,
             },
         },
@@ -49,287 +59,498 @@ PARAMS = {
     },
 }
 RELATIVE_PATH = "./Live-Tools-V2/strategies/trix"
+DAEMON_OFFSET = 1.0  # secondes après la clôture de la bougie (mode --daemon)
+REPLAY_INTERVAL = 1.0  # secondes entre deux clôtures rejouées (mode --stream --simulate)
 
-# Simuler les données pour Pyodide
-def simulate_ohlcv(pair, timeframe, limit=600):
-    prices = [3000 + np.sin(i/10) * 100 + np.random.normal(0, 10) for i in range(limit)]
-    df = pd.DataFrame({
-        'date': pd.date_range(end=datetime.datetime.now(), periods=limit, freq=timeframe.upper()),
-        'open': prices,
-        'high': [p + np.random.uniform(0, 10) for p in prices],
-        'low': [p - np.random.uniform(0, 10) for p in prices],
-        'close': prices,
-        'volume': [np.random.uniform(100, 1000) for _ in range(limit)]
-    })
-    df.set_index('date', inplace=True)
-    return df
-
-# Logger simple pour remplacer DiscordLogger
-class SimpleLogger:
-    def __init__(self, log_file="trading_log.txt"):
-        self.log_file = log_file
-
-    def log(self, message):
-        timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        log_entry = f"[{timestamp}] {message}\n"
-        print(log_entry.strip())
-        with open(self.log_file, "a") as f:
-            f.write(log_entry)
-
-    async def send_now(self, message, level="INFO"):
-        self.log(f"{level}: {message}")
+# Simuler les données pour Pyodide : la dernière bougie est celle en cours, comme get_last_ohlcv()
+async def simulate_ohlcv(pair, timeframe, limit=600):
+    from utilities.sim_exchange import synthetic_ohlcv
+    now = int(datetime.datetime.now().timestamp() * 1000)
+    return synthetic_ohlcv(timeframe, now, limit, seed=zlib.crc32(pair.encode()), model="regime")
 
-async def main():
+def load_account(account_name=ACCOUNT_NAME):
     # Charger les clés API depuis secret.json ou variables d'environnement
     try:
         with open("secret.json", "r") as f:
             accounts = json.load(f)
-        account = accounts[ACCOUNT_NAME]
+        return accounts[account_name]
     except FileNotFoundError:
-        account = {
+        return {
             "public_api": os.getenv("BYBIT_PUBLIC_API", ""),
             "secret_api": os.getenv("BYBIT_SECRET_API", ""),
             "password": os.getenv("BYBIT_PASSWORD", "")
         }
 
-    margin_mode = MARGIN_MODE
-    leverage = LEVERAGE
-    exchange_leverage = math.ceil(leverage)
-    params = PARAMS
-    dl = SimpleLogger()
+def load_accounts(account_names):
+    # "all" : tous les comptes de secret.json
+    try:
+        with open("secret.json", "r") as f:
+            accounts = json.load(f)
+    except FileNotFoundError as error:
+        # Les variables d'environnement ne décrivent que le compte par défaut
+        if list(account_names) != [ACCOUNT_NAME]:
+            raise FileNotFoundError(f"secret.json is required to load the accounts {', '.join(account_names)}") from error
+        return {ACCOUNT_NAME: load_account()}
+    if account_names == ["all"]:
+        return accounts
+    return {account_name: accounts[account_name] for account_name in account_names}
 
+def session_name(account_name, simulate):
+    # Les fichiers de simulation ne doivent pas écraser ceux du compte réel
+    if not simulate:
+        return account_name
+    return SIMULATION_ACCOUNT_NAME if account_name == ACCOUNT_NAME else f"{SIMULATION_ACCOUNT_NAME}_{account_name}"
+
+def create_exchanges(account_names, simulate=False):
+    return {
+        session_name(account_name, simulate): create_exchange(account, simulate, session_name(account_name, simulate))
+        for account_name, account in load_accounts(account_names).items()
+    }
+
+async def close_exchanges(exchanges):
+    await asyncio.gather(*[exchange.close() for exchange in exchanges.values()])
+
+def export_metrics(exchanges):
+    for account_name, exchange in exchanges.items():
+        exchange.metrics.export(f"{RELATIVE_PATH}/metrics", account_name)
+        exchange.metrics.reset()
+
+async def export_metrics_safely(exchanges, dl):
+    # En mode daemon/stream, une erreur d'écriture des métriques (disque plein...) n'arrête pas le processus
+    try:
+        export_metrics(exchanges)
+    except Exception as e:
+        await dl.send_now(f"Error exporting metrics: {e}", level="ERROR")
+
+def create_exchange(account, simulate=False, account_name=ACCOUNT_NAME):
+    if simulate:
+        # Échange local rejoué sur des bougies synthétiques, sans appel à Bybit
+        from utilities.sim_exchange import SimExchange
+        return SimExchange(latency=0.05, latency_jitter=0.05, scheduler=RequestScheduler(), leverage_cache_path=f"{RELATIVE_PATH}/leverage_{account_name}.json")
     # Initialiser l'échange Bybit
-    exchange = PerpExchange(
+    return PerpExchange(
         exchange_name="bybit",
         public_api=account["public_api"],
         secret_api=account["secret_api"],
-        password=account["password"]
+        password=account["password"],
+        ohlcv_store=OhlcvStore(f"{RELATIVE_PATH}/ohlcv"),
+        markets_cache_path=f"{RELATIVE_PATH}/markets_bybit.json",
+        leverage_cache_path=f"{RELATIVE_PATH}/leverage_{account_name}.json",
     )
 
-    print(f"--- Execution started at {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')} ---")
-    dl.log(f"Starting strategy for Bybit with margin mode: {margin_mode}, leverage: {exchange_leverage}")
+def load_key_params():
+    """{"tf-param-pair": config} of PARAMS, each config tagged with its pair and timeframe, and the pairs."""
+    params = copy.deepcopy(PARAMS)
+    pair_list = []
+    key_params = {}
+    for tf in params.keys():
+        for param in params[tf].keys():
+            for pair in params[tf][param].keys():
+                if pair not in pair_list:
+                    pair_list.append(pair)
+                key_params[f"{tf}-{param}-{pair}"] = params[tf][param][pair]
+                key_params[f"{tf}-{param}-{pair}"]["pair"] = pair
+                key_params[f"{tf}-{param}-{pair}"]["tf"] = tf
+    return key_params, pair_list
 
-    # Charger ou créer le fichier de positions
-    try:
-        with open(f"{RELATIVE_PATH}/positions_{ACCOUNT_NAME}.json", "r") as f:
-            key_positions = json.load(f)
-    except Exception:
-        key_positions = {}
-        with open(f"{RELATIVE_PATH}/positions_{ACCOUNT_NAME}.json", "w") as f:
-            json.dump(key_positions, f)
+def ohlcv_plan(key_params, pair_bases):
+    """Candles needed per pair and timeframe ({pair: {tf: limit}}) by the configs of key_params, and
+    the base candles to fetch for them ({pair: (base_tf, limit)})."""
+    # Historique minimal pour que les indicateurs aient convergé, par paire/timeframe
+    pair_timeframes = {}
+    for key_param_object in key_params.values():
+        tf_configs = pair_timeframes.setdefault(key_param_object["pair"], {})
+        tf_configs.setdefault(key_param_object["tf"], []).append(key_param_object)
+    pair_limits = {
+        pair: {tf: plan_lookback(configs, LOOKBACK_TOLERANCE) for tf, configs in tf_configs.items()}
+        for pair, tf_configs in pair_timeframes.items()
+    }
+    base_requests = {pair: (pair_bases[pair], base_limit(limits, pair_bases[pair])) for pair, limits in pair_limits.items()}
+    return pair_limits, base_requests
 
-    try:
-        await exchange.load_markets()
-
-        pair_list = []
-        key_params = {}
-        for tf in params.keys():
-            for param in params[tf].keys():
-                for pair in params[tf][param].keys():
-                    if pair not in pair_list:
-                        pair_list.append(pair)
-                    key_params[f"{tf}-{param}-{pair}"] = params[tf][param][pair]
-                    key_params[f"{tf}-{param}-{pair}"]["pair"] = pair
-                    key_params[f"{tf}-{param}-{pair}"]["tf"] = tf
-
-        key_params_copy = copy.deepcopy(key_params)
-        for key_param in key_params_copy.keys():
-            key_param_object = key_params_copy[key_param]
-            info = exchange.get_pair_info(key_param_object["pair"])
-            if info is None:
-                await dl.send_now(f"Pair {key_param_object['pair']} not found, removing from params...", level="WARNING")
-                del key_params[key_param]
+async def prepare_market_data(exchange, dl, timeframes=None):
+    """Load markets, candles and indicators once, for every account trading PARAMS."""
+    metrics = exchange.metrics
+    key_params, pair_list = load_key_params()
+
+    with metrics.span("phase.load_markets"):
+        await exchange.load_markets(pair_list)
+
+    key_params_copy = copy.deepcopy(key_params)
+    for key_param in key_params_copy.keys():
+        key_param_object = key_params_copy[key_param]
+        info = exchange.get_pair_info(key_param_object["pair"])
+        if info is None:
+            await dl.send_now(f"Pair {key_param_object['pair']} not found, removing from params...", level="WARNING")
+            del key_params[key_param]
+            if key_param_object["pair"] in pair_list:
                 pair_list.remove(key_param_object["pair"])
 
-        dl.log(f"Getting data and indicators on {len(pair_list)} pairs...")
-        tasks = []
-        keys = []
-        tf_pair_loaded = []
-        for key_param in key_params.keys():
-            key_param_object = key_params[key_param]
-            if "size" not in key_param_object.keys():
-                key_param_object["size"] = 1/len(key_params)
-            if f"{key_param_object['pair']}-{key_param_object['tf']}" not in tf_pair_loaded:
-                tf_pair_loaded.append(f"{key_param_object['pair']}-{key_param_object['tf']}")
-                keys.append(f"{key_param_object['pair']}-{key_param_object['tf']}")
-                if platform.system() == "Emscripten":
-                    tasks.append(asyncio.ensure_future(asyncio.coroutine(lambda: simulate_ohlcv(key_param_object["pair"], key_param_object["tf"]))()))
-                else:
-                    tasks.append(exchange.get_last_ohlcv(key_param_object["pair"], key_param_object["tf"], 600))
+    for key_param in key_params.keys():
+        if "size" not in key_params[key_param].keys():
+            key_params[key_param]["size"] = 1/len(key_params)
+
+    # Un seul flux par paire, au plus petit de ses timeframes ; les autres en sont dérivés
+    all_timeframes = {}
+    for value in key_params.values():
+        all_timeframes.setdefault(value["pair"], set()).add(value["tf"])
+    pair_bases = base_timeframes(all_timeframes)
+
+    # En mode daemon, seuls les timeframes dont la bougie vient de clôturer sont évalués
+    if timeframes is not None:
+        key_params = {key: value for key, value in key_params.items() if value["tf"] in timeframes}
+        pair_list = [pair for pair in pair_list if pair in [value["pair"] for value in key_params.values()]]
 
+    dl.log(f"Getting data and indicators on {len(pair_list)} pairs...")
+    pair_limits, base_requests = ohlcv_plan(key_params, pair_bases)
+    tasks = []
+    for pair, (base_tf, limit) in base_requests.items():
+        if platform.system() == "Emscripten":
+            tasks.append(simulate_ohlcv(pair, base_tf, limit))
+        else:
+            tasks.append(exchange.get_last_ohlcv(pair, base_tf, limit))
+
+    with metrics.span("phase.ohlcv"):
         dfs = await asyncio.gather(*tasks)
-        df_data = dict(zip(keys, dfs))
-        df_list = {}
-
-        for key_param in key_params.keys():
-            key_param_object = key_params[key_param]
-            df = df_data[f"{key_param_object['pair']}-{key_param_object['tf']}"]
-            trix_obj = Trix(
-                close=df["close"],
-                trix_length=key_param_object["trix_length"],
-                trix_signal_length=key_param_object["trix_signal_length"],
-                trix_signal_type=key_param_object["trix_signal_type"],
-            )
-            df["trix"] = trix_obj.get_trix_pct_line()
-            df["trix_signal"] = trix_obj.get_trix_signal_line()
-            df["trix_hist"] = df["trix"] - df["trix_signal"]
-            df["long_ma"] = ta.trend.ema_indicator(df["close"], window=key_param_object["long_ma_length"])
-            df_list[key_param] = df
+    df_data = {}
+    for (pair, (base_tf, _)), df in zip(base_requests.items(), dfs):
+        for tf, limit in pair_limits[pair].items():
+            df_data[f"{pair}-{tf}"] = resample_ohlcv(df, tf, base_tf).tail(limit)
+    df_list = {}
+
+    # Un seul calcul d'indicateurs par paire/timeframe pour toutes les configurations
+    with metrics.span("phase.indicators"):
+        for tf_pair, df in df_data.items():
+            group = [
+                key_param for key_param in key_params.keys()
+                if f"{key_params[key_param]['pair']}-{key_params[key_param]['tf']}" == tf_pair
+            ]
+            trix = trix_batch(
+                df["close"],
+                [key_params[key_param]["trix_length"] for key_param in group],
+                [key_params[key_param]["trix_signal_length"] for key_param in group],
+                [key_params[key_param]["trix_signal_type"] for key_param in group],
+            ).reshape(len(df), 3, len(group))
+            long_ma = ema_batch(df["close"], [key_params[key_param]["long_ma_length"] for key_param in group])
+            for i, key_param in enumerate(group):
+                df_list[key_param] = df.assign(
+                    trix=trix[:, 0, i],
+                    trix_signal=trix[:, 1, i],
+                    trix_hist=trix[:, 2, i],
+                    long_ma=long_ma[:, i],
+                )
+
+    return key_params, pair_list, df_list
 
+async def execute_account(exchange, dl, key_params, pair_list, df_list, account_name=ACCOUNT_NAME):
+    """Balance, positions, leverage and orders of one account from prepare_market_data() results."""
+    margin_mode = MARGIN_MODE
+    leverage = LEVERAGE
+    exchange_leverage = math.ceil(leverage)
+    metrics = exchange.metrics
+
+    # Snapshot + journal : chaque ouverture/fermeture est écrite dès qu'elle a lieu
+    key_positions = PositionStore(f"{RELATIVE_PATH}/positions_{account_name}.json")
+
+    # Précision des ordres : les marchés viennent du cache disque partagé
+    with metrics.span("phase.load_markets"):
+        await exchange.load_markets(pair_list)
+
+    with metrics.span("phase.balance"):
         usdt_balance = 10000.0 if platform.system() == "Emscripten" else (await exchange.get_balance()).total
-        dl.log(f"Balance: {round(usdt_balance, 2)} USDT")
+    dl.log(f"Balance: {round(usdt_balance, 2)} USDT")
 
+    with metrics.span("phase.positions"):
         positions = await exchange.get_open_positions(pair_list) if platform.system() != "Emscripten" else []
-        long_exposition = sum([p.usd_size for p in positions if p.side == "long"])
-        short_exposition = sum([p.usd_size for p in positions if p.side == "short"])
-        unrealized_pnl = sum([p.unrealizedPnl for p in positions])
-        dl.log(f"Unrealized PNL: {round(unrealized_pnl, 2)}$ | Long Exposition: {round(long_exposition, 2)}$ | Short Exposition: {round(short_exposition, 2)}$")
-        dl.log(f"Current positions:")
-        for position in positions:
-            dl.log(f"{position.side.upper()} {position.size} {position.pair} ~{position.usd_size}$ (+ {position.unrealizedPnl}$)")
-        
-        try:
-            dl.log(f"Setting {margin_mode} x{exchange_leverage} on {len(pair_list)} pairs...")
-            tasks = [
-                exchange.set_margin_mode_and_leverage(pair, margin_mode, exchange_leverage)
-                for pair bulk in pair_list if pair not in [position.pair for position in positions]
-            ]
-            await asyncio.gather(*tasks)
-        except Exception as e:
-            await dl.send_now(f"Error setting margin mode/leverage: {e}", level="ERROR")
-
-        # --- Close positions ---
-        key_positions_copy = copy.deepcopy(key_positions)
-        for key_position in key_positions_copy:
-            position_object = key_positions_copy[key_position]
-            param_object = key_params[key_position]
-            df = df_list[key_position]
-            exchange_positions = [p for p in positions if (p.pair == param_object["pair"] and p.side == position_object["side"])]
-            if len(exchange_positions) == 0:
-                dl.log(f"No position found for {param_object['pair']}, skipping...")
-                continue
-            exchange_position_size = sum([p.size for p in exchange_positions])
-            row = df.iloc[-2]
-
-            if position_object["side"] == "long" and row["trix_hist"] < 0:
-                close_size = min(position_object["size"], exchange_position_size)
-                try:
-                    order = await exchange.place_order(
-                        pair=param_object["pair"],
-                        side="sell",
-                        price=None,
-                        size=close_size,
-                        type="market",
-                        reduce=True,
-                        margin_mode=margin_mode,
-                        leverage=exchange_leverage,
-                        error=True,
-                    )
-                    if order is not None:
-                        del key_positions[key_position]
-                        dl.log(f"{key_position} Closed {order.size} {param_object['pair']} long")
-                except Exception as e:
-                    await dl.send_now(f"{key_position} Error closing {param_object['pair']} long: {e}", level="ERROR")
-                    continue
-            elif position_object["side"] == "short" and row["trix_hist"] > 0:
-                close_size = min(position_object["size"], exchange_position_size)
-                try:
-                    order = await exchange.place_order(
-                        pair=param_object["pair"],
-                        side="buy",
-                        price=None,
-                        size=close_size,
-                        type="market",
-                        reduce=True,
-                        margin_mode=margin_mode,
-                        leverage=exchange_leverage,
-                        error=True,
-                    )
-                    if order is not None:
-                        del key_positions[key_position]
-                        dl.log(f"{key_position} Closed {order.size} {param_object['pair']} short")
-                except Exception as e:
-                    await dl.send_now(f"{key_position} Error closing {param_object['pair']} short: {e}", level="ERROR")
-                    continue
-
-        # --- Open positions ---
-        for key_param in key_params.keys():
-            if key_param in key_positions.keys():
-                continue
-            param_object = key_params[key_param]
-            df = df_list[key_param]
-            row = df.iloc[-2]
-            last_price = df["close"].iloc[-1]
-            if row["trix_hist"] > 0 and row["close"] > row["long_ma"] and "long" in SIDE:
-                open_size = (usdt_balance * param_object["size"]) / last_price * leverage
-                try:
-                    order = await exchange.place_order(
-                        pair=param_object["pair"],
-                        side="buy",
-                        price=None,
-                        size=open_size,
-                        type="market",
-                        reduce=False,
-                        margin_mode=margin_mode,
-                        leverage=exchange_leverage,
-                        error=True,
-                    )
-                    if order is not None:
-                        key_positions[key_param] = {
-                            "side": "long",
-                            "size": open_size,
-                            "open_price": order.price,
-                            "open_time": order.timestamp,
-                        }
-                        dl.log(f"{key_param} Opened {order.size} {param_object['pair']} long")
-                except Exception as e:
-                    await dl.send_now(f"{key_param} Error opening {param_object['pair']} long: {e}", level="ERROR")
-                    continue
-            elif row["trix_hist"] < 0 and row["close"] < row["long_ma"] and "short" in SIDE:
-                open_size = (usdt_balance * param_object["size"]) / last_price * leverage
-                try:
-                    order = await exchange.place_order(
-                        pair=param_object["pair"],
-                        side="sell",
-                        price禁止
-
-                        price=None,
-                        size=open_size,
-                        type="market",
-                        reduce=False,
-                        margin_mode=margin_mode,
-                        leverage=exchange_leverage,
-                        error=True,
-                    )
-                    if order is not None:
-                        key_positions[key_param] = {
-                            "side": "short",
-                            "size": open_size,
-                            "open_price": order.price,
-                            "open_time"?
-                            "open_time": order.timestamp,
-                        }
-                        dl.log(f"{key_param} Opened {order.size} {param_object['pair']} short")
-                except Exception as e:
-                    await dl.send_now(f"{key_param} Error opening {param_object['pair']} short: {e}", level="ERROR")
-                    continue
-
-        # Sauvegarder les positions
-        if platform.system() != "Emscripten":
-            with open(f"{RELATIVE_PATH}/positions_{ACCOUNT_NAME}.json", "w") as f:
-                json.dump(key_positions, f)
-
-        await exchange.close()
-        print(f"--- Execution finished at {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')} ---")
+    exposure = exposure_summary(positions)
+    dl.log(f"Unrealized PNL: {round(exposure['unrealized_pnl'], 2)}$ | Long Exposition: {round(exposure['long_exposition'], 2)}$ | Short Exposition: {round(exposure['short_exposition'], 2)}$")
+    dl.log(f"Current positions:")
+    for position in positions:
+        dl.log(f"{position.side.upper()} {position.size} {position.pair} ~{position.usd_size}$ (+ {position.unrealizedPnl}$)")
+    
+    # Seules les paires dont le levier connu diffère sont modifiées
+    position_pairs = {position.pair for position in positions}
+    with metrics.span("phase.leverage"):
+        leverage_results = await exchange.ensure_margin_mode_and_leverage(
+            [pair for pair in pair_list if pair not in position_pairs], margin_mode, exchange_leverage
+        )
+    dl.log(f"Setting {margin_mode} x{exchange_leverage} on {len(leverage_results)} pairs...")
+    for pair, result in leverage_results.items():
+        if isinstance(result, Exception):
+            await dl.send_now(f"Error setting margin mode/leverage on {pair}: {result}", level="ERROR")
+
+    # --- Close positions ---
+    exchange_sizes, orphan_keys = key_positions.reconcile(
+        positions, {key_param: key_params[key_param]["pair"] for key_param in key_params.keys()}
+    )
+    orphan_keys = set(orphan_keys)
+    for key_position in orphan_keys:
+        dl.log(f"No position found for {key_params[key_position]['pair']}, skipping...")
+    close_keys = []
+    close_orders = []
+    for key_position, position_object in key_positions.items():
+        if key_position not in key_params or key_position in orphan_keys:
+            continue
+        param_object = key_params[key_position]
+        df = df_list[key_position]
+        exchange_position_size = exchange_sizes[(param_object["pair"], position_object["side"])]
+        row = df.iloc[-2]
+
+        if (position_object["side"] == "long" and row["trix_hist"] < 0) or (position_object["side"] == "short" and row["trix_hist"] > 0):
+            close_keys.append(key_position)
+            close_orders.append({
+                "pair": param_object["pair"],
+                "side": "sell" if position_object["side"] == "long" else "buy",
+                "price": None,
+                "size": min(position_object["size"], exchange_position_size),
+                "type": "market",
+                "reduce": True,
+                "margin_mode": margin_mode,
+                "leverage": exchange_leverage,
+            })
+
+    # Toutes les fermetures partent en parallèle, avant les ouvertures
+    with metrics.span("phase.close_orders"):
+        results = await exchange.place_orders(close_orders)
+    for key_position, order_request, order in zip(close_keys, close_orders, results):
+        side = key_positions[key_position]["side"]
+        if isinstance(order, Exception):
+            await dl.send_now(f"{key_position} Error closing {order_request['pair']} {side}: {order}", level="ERROR")
+            continue
+        key_positions.close(key_position)
+        dl.log(f"{key_position} Closed {order.size} {order_request['pair']} {side} ({round(order.latency_ms)} ms)")
+
+    # --- Open positions ---
+    open_keys = []
+    open_orders = []
+    for key_param in key_params.keys():
+        if key_param in key_positions.keys():
+            continue
+        param_object = key_params[key_param]
+        df = df_list[key_param]
+        row = df.iloc[-2]
+        last_price = df["close"].iloc[-1]
+        if row["trix_hist"] > 0 and row["close"] > row["long_ma"] and "long" in SIDE:
+            side = "buy"
+        elif row["trix_hist"] < 0 and row["close"] < row["long_ma"] and "short" in SIDE:
+            side = "sell"
+        else:
+            continue
+        open_keys.append(key_param)
+        open_orders.append({
+            "pair": param_object["pair"],
+            "side": side,
+            "price": None,
+            "size": (usdt_balance * param_object["size"]) / last_price * leverage,
+            "type": "market",
+            "reduce": False,
+            "margin_mode": margin_mode,
+            "leverage": exchange_leverage,
+        })
+
+    with metrics.span("phase.open_orders"):
+        results = await exchange.place_orders(open_orders)
+    opened = []
+    for key_param, order_request, order in zip(open_keys, open_orders, results):
+        side = "long" if order_request["side"] == "buy" else "short"
+        if isinstance(order, Exception):
+            await dl.send_now(f"{key_param} Error opening {order_request['pair']} {side}: {order}", level="ERROR")
+            continue
+        key_positions.open(key_param, {
+            "side": side,
+            "size": order_request["size"],
+            "open_price": order.price,
+            "open_time": order.timestamp,
+        })
+        opened.append((key_param, order))
+        dl.log(f"{key_param} Opened {order.size} {order_request['pair']} {side} ({round(order.latency_ms)} ms)")
+
+    # Prix et heure d'exécution récupérés une fois tous les ordres envoyés
+    with metrics.span("phase.resolve_orders"):
+        resolved_orders = await exchange.resolve_orders([order for _, order in opened])
+    for (key_param, _), order in zip(opened, resolved_orders):
+        key_positions.update(key_param, open_price=order.price, open_time=order.timestamp)
+
+    # Rendre le journal durable, le compacter de temps en temps
+    with metrics.span("phase.save_positions"):
+        key_positions.sync()
+        key_positions.close_journal()
+
+async def run_strategy(exchange, dl, timeframes=None, account_name=ACCOUNT_NAME):
+    key_params, pair_list, df_list = await prepare_market_data(exchange, dl, timeframes)
+    await execute_account(exchange, dl, key_params, pair_list, df_list, account_name)
+
+async def run_accounts(exchanges, dl, timeframes=None):
+    """Run the strategy on every {account_name: exchange}: market data and indicators are fetched
+    and computed once with the first exchange, then each account trades concurrently."""
+    if len(exchanges) == 1:
+        account_name, exchange = next(iter(exchanges.items()))
+        return await run_strategy(exchange, dl, timeframes, account_name)
+    data_exchange = next(iter(exchanges.values()))
+    key_params, pair_list, df_list = await prepare_market_data(data_exchange, dl, timeframes)
+    results = await asyncio.gather(*[
+        execute_account(exchange, AccountLogger(dl, account_name), key_params, pair_list, df_list, account_name)
+        for account_name, exchange in exchanges.items()
+    ], return_exceptions=True)
+    errors = [(account_name, result) for account_name, result in zip(exchanges.keys(), results) if isinstance(result, Exception)]
+    for account_name, error in errors:
+        exchanges[account_name].metrics.increment("run.errors")
+        await dl.send_now(f"[{account_name}] Error during execution: {error}", level="ERROR")
+    if len(errors) == len(exchanges):
+        raise errors[0][1]
+
+class AccountLogger:
+    # Préfixe les messages du nom du compte quand plusieurs comptes tournent ensemble
+    def __init__(self, dl, account_name):
+        self.dl = dl
+        self.prefix = f"[{account_name}] "
+
+    def log(self, message, level="INFO", **fields):
+        self.dl.log(self.prefix + message, level=level, **fields)
+
+    async def send_now(self, message, level="INFO"):
+        await self.dl.send_now(self.prefix + message, level=level)
+
+def create_logger(json_log=False, webhook_url=None):
+    return AsyncLogger(
+        "trading_log.jsonl" if json_log else "trading_log.txt",
+        json_format=json_log,
+        webhook_url=webhook_url,
+    )
+
+async def main(simulate=False, json_log=False, webhook_url=None, account_names=(ACCOUNT_NAME,)):
+    dl = create_logger(json_log, webhook_url)
+    exchanges = create_exchanges(list(account_names), simulate)
+    data_exchange = next(iter(exchanges.values()))
+
+    dl.log("--- Execution started ---")
+    dl.log(f"Starting strategy for Bybit on {', '.join(exchanges.keys())} with margin mode: {MARGIN_MODE}, leverage: {math.ceil(LEVERAGE)}")
+
+    try:
+        with data_exchange.metrics.span("phase.total"):
+            await run_accounts(exchanges, dl)
+        export_metrics(exchanges)
+        await close_exchanges(exchanges)
+        dl.log("--- Execution finished ---")
         dl.log("Execution completed")
 
     except Exception as e:
-        await exchange.close()
+        await close_exchanges(exchanges)
         await dl.send_now(f"Critical error: {e}", level="ERROR")
         raise e
+    finally:
+        dl.close()
+
+def next_candle_close(timeframe, now):
+    tf_seconds = TIMEFRAME_MS[timeframe] / 1000
+    return (math.floor(now / tf_seconds) + 1) * tf_seconds
+
+async def run_daemon(offset=DAEMON_OFFSET, simulate=False, json_log=False, webhook_url=None, account_names=(ACCOUNT_NAME,)):
+    dl = create_logger(json_log, webhook_url)
+    exchanges = create_exchanges(list(account_names), simulate)
+    data_exchange = next(iter(exchanges.values()))
+    dl.log(f"Starting daemon for Bybit on {', '.join(exchanges.keys())}, {list(PARAMS.keys())} candles, offset {offset}s")
+
+    try:
+        while True:
+            now = time.time()
+            closes = {tf: next_candle_close(tf, now) for tf in PARAMS.keys()}
+            next_close = min(closes.values())
+            timeframes = [tf for tf in closes.keys() if closes[tf] == next_close]
+            await asyncio.sleep(max(0.0, next_close + offset - time.time()))
+
+            dl.log(f"--- Execution started ({', '.join(timeframes)}) ---")
+            try:
+                with data_exchange.metrics.span("phase.total"):
+                    await run_accounts(exchanges, dl, timeframes=timeframes)
+                dl.log("Execution completed")
+            except Exception as e:
+                # Une erreur transitoire ne doit pas arrêter le daemon, on attend la prochaine bougie
+                data_exchange.metrics.increment("run.errors")
+                await dl.send_now(f"Error during {', '.join(timeframes)} execution: {e}", level="ERROR")
+            await export_metrics_safely(exchanges, dl)
+    finally:
+        await close_exchanges(exchanges)
+        dl.close()
+
+def stream_subscriptions():
+    # Toutes les configurations, chaque paire à son timeframe de base
+    key_params, _ = load_key_params()
+    all_timeframes = {}
+    for value in key_params.values():
+        all_timeframes.setdefault(value["pair"], set()).add(value["tf"])
+    _, base_requests = ohlcv_plan(key_params, base_timeframes(all_timeframes))
+    return {(pair, base_tf): limit for pair, (base_tf, limit) in base_requests.items()}
+
+async def run_stream(simulate=False, json_log=False, webhook_url=None, account_names=(ACCOUNT_NAME,), replay_interval=REPLAY_INTERVAL):
+    """Evaluate each timeframe as soon as the kline websocket confirms its candle close."""
+    # aiohttp n'est chargé qu'en mode streaming
+    from utilities.kline_stream import KlineReplayServer
+    dl = create_logger(json_log, webhook_url)
+    exchanges = create_exchanges(list(account_names), simulate)
+    data_exchange = next(iter(exchanges.values()))
+    subscriptions = stream_subscriptions()
+    server = None
+    url = None
+    if simulate:
+        # Les bougies de SimExchange rejouées par un websocket local, l'horloge des comptes suit le flux
+        now = data_exchange.now_ms()
+        for exchange in exchanges.values():
+            exchange.now = now
+        server = KlineReplayServer({key: data_exchange._get_candles(*key) for key in subscriptions}, now, interval=replay_interval)
+        url = await server.start()
+    dl.log(f"Starting stream for Bybit on {', '.join(exchanges.keys())}, {len(subscriptions)} kline subscriptions")
+
+    async def on_close(close_ts, keys):
+        timeframes = [tf for tf in PARAMS.keys() if close_ts % TIMEFRAME_MS[tf] == 0]
+        if not timeframes:
+            return
+        if simulate:
+            for exchange in exchanges.values():
+                exchange.now = close_ts
+        close_time = datetime.datetime.fromtimestamp(close_ts / 1000).strftime('%Y-%m-%d %H:%M:%S')
+        dl.log(f"--- Execution started ({', '.join(timeframes)} close {close_time}) ---")
+        try:
+            with data_exchange.metrics.span("phase.total"):
+                await run_accounts(exchanges, dl, timeframes=timeframes)
+            dl.log("Execution completed")
+        except Exception as e:
+            # Comme le daemon : une erreur transitoire n'arrête pas le flux
+            data_exchange.metrics.increment("run.errors")
+            await dl.send_now(f"Error during {', '.join(timeframes)} execution: {e}", level="ERROR")
+        await export_metrics_safely(exchanges, dl)
+
+    try:
+        await data_exchange.stream_klines(subscriptions, on_close, url=url, reconnect=not simulate)
+    finally:
+        if server is not None:
+            await server.stop()
+        await close_exchanges(exchanges)
+        dl.close()
 
 if platform.system() == "Emscripten":
     asyncio.ensure_future(main())
 else:
     if __name__ == "__main__":
-        asyncio.run(main())
\ No newline at end of file
+        parser = argparse.ArgumentParser()
+        parser.add_argument("--daemon", action="store_true", help="run continuously, evaluating each timeframe at its candle close")
+        parser.add_argument("--offset", type=float, default=DAEMON_OFFSET, help="seconds to wait after the candle close")
+        parser.add_argument("--stream", action="store_true", help="run continuously, evaluating each timeframe when the kline websocket confirms its close")
+        parser.add_argument("--replay-interval", type=float, default=REPLAY_INTERVAL, help="seconds between replayed candle closes (--stream --simulate)")
+        parser.add_argument("--simulate", action="store_true", help="trade against the local SimExchange instead of Bybit")
+        parser.add_argument("--metrics-summary", action="store_true", help="print p50/p95 phase timings of the recorded runs and exit")
+        parser.add_argument("--accounts", default=ACCOUNT_NAME, help="comma-separated secret.json accounts to trade, or 'all'")
+        parser.add_argument("--json-log", action="store_true", help="write the log as JSON lines instead of trading_log.txt")
+        parser.add_argument("--webhook-url", default=os.getenv("TRIX_WEBHOOK_URL"), help="also POST send_now messages to this webhook")
+        args = parser.parse_args()
+        account_names = args.accounts.split(",")
+        if args.metrics_summary:
+            account_name = session_name(account_names[0], args.simulate)
+            for name, summary in summarize(f"{RELATIVE_PATH}/metrics/{account_name}.jsonl").items():
+                print(f"{name:<40} p50 {summary['p50']:>10.1f}  p95 {summary['p95']:>10.1f}  ({summary['runs']} runs)")
+        elif args.stream:
+            asyncio.run(run_stream(args.simulate, args.json_log, args.webhook_url, account_names, args.replay_interval))
+        elif args.daemon:
+            asyncio.run(run_daemon(args.offset, args.simulate, args.json_log, args.webhook_url, account_names))
+        else:
+            asyncio.run(main(args.simulate, args.json_log, args.webhook_url, account_names))
\ No newline at end of file